@@ -0,0 +1,190 @@
+"""
+Benchmarks for load, save, search, sampling and rendering on synthetic decks.
+
+    python benchmarks/bench.py run [--sizes 1000,100000,1000000] [--repeat 5] [--out benchmarks/latest.json]
+    python benchmarks/bench.py compare <baseline.json> [<results.json>] [--threshold 0.2]
+
+`compare` exits with code 1 when any benchmark got slower than the baseline by more than the threshold.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+from main import Decks, FuzzyIndex, Ranker, SearchCursor, SearchIndex, State, StrTool, Style, Term, en2ru  # noqa: E402
+
+HERE = Path(__file__).resolve().parent
+LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def make_deck(size: int, seed: int = 0) -> dict[str, dict]:
+    """Synthetic deck: latin phrases, translations typed through en2ru, rates skewed like a long-used deck."""
+    rnd = random.Random(seed)
+    deck = {}
+    while len(deck) < size:
+        words = [''.join(rnd.choices(LETTERS, k=rnd.randint(2, 9))) for _ in range(rnd.choice((1, 1, 1, 2, 3)))]
+        phrase = ' '.join(words).capitalize()
+        typed_words = [''.join(rnd.choices(LETTERS, k=rnd.randint(3, 10))) for _ in words]
+        translation = ''.join(en2ru.get(c, c) for c in ' '.join(typed_words)).capitalize()
+        deck[phrase] = {'translation': translation, 'rate': 0.75 ** rnd.randint(0, 12) * 1.25 ** rnd.randint(0, 4)}
+    return deck
+
+
+def measure(fn, repeat: int) -> float:
+    """Median wall time of `repeat` calls, in seconds."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def typed(query: str) -> list[str]:
+    return [query[: i + 1] for i in range(len(query))]
+
+
+def bench_size(size: int, repeat: int, workdir: str) -> dict[str, float]:
+    results = {}
+    raw = make_deck(size)
+    path = os.path.join(workdir, f'deck-{size}.json')
+    with open(path, 'w', encoding='utf-8') as db_file:
+        json.dump(raw, db_file, ensure_ascii=False)
+    Decks.configure({'db-path': path})
+
+    results['db.load'] = measure(Decks.open, repeat)
+    db = Decks.active
+    results['db.save'] = measure(db.save, repeat)
+
+    queries = [phrase.lower()[:6] for phrase in random.Random(1).sample(list(raw), 20)]
+
+    def explore():
+        cursor = SearchCursor()
+        for query in queries:
+            for prompt in typed(query):
+                Ranker.top(prompt, cursor.search(prompt), Term.in_height - 5)
+
+    def add():
+        for query in queries:
+            for prompt in typed(query):
+                Ranker.top(prompt, db.index.search(prompt, translations=False), 9, translations=False)
+
+    def fuzzy():
+        for query in queries:
+            db.fuzzy.search(''.join(en2ru.get(c, c) for c in query[:-1]) + 'q')
+
+    results['search.index_build'] = measure(lambda: SearchIndex(db.data).build(), repeat)
+    db.index.build()
+    results['search.explore'] = measure(explore, repeat) / len(queries)
+    results['search.add'] = measure(add, repeat) / len(queries)
+    results['search.fuzzy_build'] = measure(lambda: FuzzyIndex(db.data).build(), repeat)
+    results['search.fuzzy'] = measure(fuzzy, repeat) / len(queries)
+
+    def sample():
+        for _ in range(1000):
+            main.get_new_phrase()
+
+    results['sample.get_new_phrase'] = measure(sample, repeat) / 1000
+
+    lines = [f'{phrase} - {raw[phrase]["translation"]}' for phrase in list(raw)[:1000]]
+
+    def format_lines():
+        for line in lines:
+            StrTool.format(line, colorize=True)
+
+    def measure_lines():
+        StrTool.visible_len.cache_clear()
+        for line in lines:
+            StrTool.visible_len(line)
+
+    results['str.format'] = measure(format_lines, repeat) / len(lines)
+    results['str.visible_len'] = measure(measure_lines, repeat) / len(lines)
+
+    def frame():
+        stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            Term.reset()
+            main.explore_print()
+            Term.draw()
+        finally:
+            sys.stdout = stdout
+
+    State.parameter = None
+    main.explore_print()
+    State.parameter['promt'] = queries[0][:3]
+    State.parameter['filtered'] = Ranker.top(queries[0][:3], db.index.search(queries[0][:3]), Term.in_height - 5)
+    Term.frame = []
+    results['render.full_frame'] = measure(lambda: (Term.frame.clear(), frame()), repeat)
+    results['render.diff_frame'] = measure(frame, repeat)
+
+    Decks.close()
+    return results
+
+
+def run(args) -> None:
+    Term.width, Term.height = 80, 25
+    Term.in_width, Term.in_height = Term.width - 2, Term.height - 2
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            for name, seconds in bench_size(size, args.repeat, workdir).items():
+                report['results'][f'{name}/{size}'] = seconds
+                print(f'{name + "/" + str(size):<32} {seconds * 1000:>12.3f} ms', flush=True)
+    with open(args.out, 'w', encoding='utf-8') as out_file:
+        json.dump(report, out_file, indent=4)
+    print(f'\nWritten to {args.out}')
+
+
+def compare(args) -> None:
+    with open(args.baseline, 'r', encoding='utf-8') as baseline_file:
+        baseline = json.load(baseline_file)['results']
+    with open(args.results, 'r', encoding='utf-8') as results_file:
+        results = json.load(results_file)['results']
+    regressions = 0
+    for name in sorted(baseline.keys() & results.keys()):
+        ratio = results[name] / baseline[name] if baseline[name] else 1.0
+        if ratio > 1 + args.threshold:
+            regressions += 1
+            mark = Style.RED + 'slower' + Style.DEFAULT
+        elif ratio < 1 - args.threshold:
+            mark = Style.GREEN + 'faster' + Style.DEFAULT
+        else:
+            mark = ''
+        print(f'{name:<32} {baseline[name] * 1000:>12.3f} ms {results[name] * 1000:>12.3f} ms {ratio:>7.2f}x {mark}')
+    print(f'\n{regressions} regression(s) over {args.threshold:.0%}')
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Trans Dictionary benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run')
+    run_parser.add_argument('--sizes', type=lambda s: [int(size) for size in s.split(',')], default=[1_000, 100_000, 1_000_000])
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--out', default=str(HERE / 'latest.json'))
+    compare_parser = commands.add_parser('compare')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('results', nargs='?', default=str(HERE / 'latest.json'))
+    compare_parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        compare(args)
@@ -1,9 +1,34 @@
+import argparse
+import asyncio
+import bisect
+import codecs
+import concurrent.futures
+import contextlib
+import csv
+import functools
+import gzip
+import heapq
+import itertools
 import json
+import math
+import mmap
+import operator
 import os
 import random
+import re
+import shutil
+import signal
+import sqlite3
+import struct
 import sys
-from dataclasses import dataclass
-from typing import Any, NewType, Union, TypeAlias
+import threading
+import time
+import unicodedata
+import zlib
+from array import array
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterable, Iterator, MutableMapping
+from typing import Any, NamedTuple, NewType, TextIO, Union, TypeAlias
 
 if os.name == 'nt':
     import msvcrt
@@ -13,6 +38,7 @@ else:
 import traceback
 
 DEBUG = False
+STARTED = time.monotonic()
 
 InsertionAnyForm: TypeAlias = Union[
     str,
@@ -32,31 +58,52 @@ ru2en = {r: e for e, r in zip(en_keyboard, ru_keyboard)}
 
 
 class StrTool:
+    escape_pattern = re.compile('\033\\[[0-9;?]*[A-Za-z]')
+
+    @staticmethod
+    def char_width(c: str) -> int:
+        if unicodedata.combining(c) or unicodedata.category(c) in ('Mn', 'Me', 'Cf'):
+            return 0
+        return 2 if unicodedata.east_asian_width(c) in ('W', 'F') else 1
+
     @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def visible_len(line: str) -> int:
-        vl = 0
-        i = 0
-        while i < len(line):
-            if line[i] == '\033':
-                while line[i] != 'm':
-                    i += 1
-            else:
-                vl += 1
-            i += 1
-        return vl
+        line = StrTool.escape_pattern.sub('', line)
+        if line.isascii():
+            return len(line)
+        width = 0
+        previous = ''
+        for c in line:
+            width += StrTool.glyph_width(c, previous)
+            previous = c
+        return width
+
+    @staticmethod
+    def glyph_width(c: str, previous: str) -> int:
+        """Columns `c` adds right after `previous`."""
+        # Skin tone modifiers and ZWJ-joined emoji render inside the glyph they attach to
+        if previous == '\u200d' or '\U0001f3fb' <= c <= '\U0001f3ff':
+            return 0
+        return StrTool.char_width(c)
 
     @staticmethod
     def visible_index(line: str, index: int) -> int:
-        vi = 0
+        """Raw index up to which the line fits into `index - 1` columns, leaving one for an ellipsis."""
+        width = 0
+        previous = ''
         i = 0
-        while i < index:
-            if line[vi] == '\033':
-                while line[vi] != 'm':
-                    vi += 1
-            else:
-                i += 1
-            vi += 1
-        return vi - 1
+        while i < len(line):
+            escape = StrTool.escape_pattern.match(line, i)
+            if escape:
+                i = escape.end()
+                continue
+            width += StrTool.glyph_width(line[i], previous)
+            if width > index - 1:
+                break
+            previous = line[i]
+            i += 1
+        return i
 
     @staticmethod
     def format(line: str, final: bool = False, colorize: bool = False, palette: dict[str, str] | None = None) -> str:
@@ -138,7 +185,9 @@ class Key:
             return self.printable == other
         if isinstance(other, int):
             return self.special == other
-        return self == other
+        if isinstance(other, Key):
+            return (self.special, self.printable) == (other.special, other.printable)
+        return NotImplemented
 
     def __hash__(self):
         return hash(self.printable)
@@ -151,52 +200,1549 @@ class Key:
             return self.special_prints[self.special]
         return self.printable
 
+    script_names: dict[str, int] = {
+        'enter': Special.ENTER,
+        'backspace': Special.BACKSPACE,
+        'tab': Special.TAB,
+        'esc': Special.ESCAPE,
+        'home': Special.HOME,
+        'end': Special.END,
+        'delete': Special.DELETE,
+        'up': Special.ARROW_UP,
+        'down': Special.ARROW_DOWN,
+        'left': Special.ARROW_LEFT,
+        'right': Special.ARROW_RIGHT,
+    }
+
+    def script(self) -> str:
+        """The key in key script notation: printable keys as they are, `<lt>` for '<', `<name>` for special keys."""
+        if self.special:
+            return '<' + next(name for name, special in Key.script_names.items() if special == self.special) + '>'
+        return '<lt>' if self.printable == '<' else self.printable
+
+    @staticmethod
+    def parse_script(script: str) -> list['Key']:
+        """Keys of a key script (see Key.script), line breaks are ignored; raises ValueError on an unknown <name>."""
+        keys = []
+        for match in re.finditer('<(\\w+)>|(.)', script.replace('\n', '')):
+            if match.group(1) == 'lt':
+                keys.append(Key('<'))
+            elif match.group(1) in Key.script_names:
+                keys.append(Key(Key.script_names[match.group(1)]))
+            elif match.group(1) is not None:
+                raise ValueError(f'Unknown key <{match.group(1)}>, write <lt> for a literal "<"')
+            else:
+                keys.append(Key(match.group()))
+        return keys
+
+
+class KeyDecoder:
+    """Turns raw terminal input into Keys.
+
+    A read may end in the middle of a UTF-8 character or an escape sequence, the rest is kept for the next one.
+    An Esc with nothing after it in the same read is the Esc key itself.
+    """
+
+    sequences: dict[str, int] = {
+        '\033[A': Key.Special.ARROW_UP,
+        '\033[B': Key.Special.ARROW_DOWN,
+        '\033[C': Key.Special.ARROW_RIGHT,
+        '\033[D': Key.Special.ARROW_LEFT,
+        '\033[H': Key.Special.HOME,
+        '\033[F': Key.Special.END,
+        '\033OA': Key.Special.ARROW_UP,
+        '\033OB': Key.Special.ARROW_DOWN,
+        '\033OC': Key.Special.ARROW_RIGHT,
+        '\033OD': Key.Special.ARROW_LEFT,
+        '\033OH': Key.Special.HOME,
+        '\033OF': Key.Special.END,
+        '\033[1~': Key.Special.HOME,
+        '\033[7~': Key.Special.HOME,
+        '\033[4~': Key.Special.END,
+        '\033[8~': Key.Special.END,
+        '\033[3~': Key.Special.DELETE,
+    }
+    controls: dict[str, int] = {
+        '\r': Key.Special.ENTER,
+        '\n': Key.Special.ENTER,
+        '\t': Key.Special.TAB,
+        '\x7f': Key.Special.BACKSPACE,
+        '\b': Key.Special.BACKSPACE,
+    }
+    sequence = re.compile('\033(\\[[0-?]*[ -/]*[@-~]|O[@-~])')
+    partial = re.compile('\033(\\[[0-?]*[ -/]*|O)')
+
+    def __init__(self) -> None:
+        self.utf8 = codecs.getincrementaldecoder('utf-8')('replace')
+        self.pending = ''
+
+    def feed(self, data: bytes) -> list[Key]:
+        text = self.pending + self.utf8.decode(data)
+        self.pending = ''
+        keys = []
+        i = 0
+        while i < len(text):
+            c = text[i]
+            if c == '\033':
+                match = self.sequence.match(text, i)
+                if match is not None:
+                    if match.group() in self.sequences:
+                        keys.append(Key(self.sequences[match.group()]))
+                    i = match.end()
+                    continue
+                if self.partial.fullmatch(text, i):
+                    self.pending = text[i:]
+                    break
+                keys.append(Key(Key.Special.ESCAPE))
+            elif c in self.controls:
+                keys.append(Key(self.controls[c]))
+            elif c >= ' ':
+                keys.append(Key(c))
+            i += 1
+        return keys
+
+
+class Schedule(NamedTuple):
+    """When a phrase is due for review (unix time), its current interval in days and its SM-2 ease factor."""
+
+    due: float
+    interval: float
+    ease: float
+
 
-@dataclass
 class Record:
-    translation: str
-    rate: float
+    """A phrase's translation, rate and review schedule: either standalone values or a view of one slot of a Deck."""
+
+    __slots__ = ('deck', 'slot', '_translation', '_rate', '_schedule')
+
+    def __init__(self, translation: str, rate: float = 1, schedule: Schedule | None = None) -> None:
+        self.deck: Deck | None = None
+        self.slot = -1
+        self._translation = translation
+        self._rate = rate
+        self._schedule = schedule
+
+    @staticmethod
+    def view(deck: 'Deck', slot: int) -> 'Record':
+        record = Record.__new__(Record)
+        record.deck = deck
+        record.slot = slot
+        return record
+
+    @property
+    def translation(self) -> str:
+        return self._translation if self.deck is None else self.deck.translation(self.slot)
+
+    @translation.setter
+    def translation(self, value: str) -> None:
+        if self.deck is None:
+            self._translation = value
+        else:
+            self.deck.translations[self.slot] = value
+
+    @property
+    def rate(self) -> float:
+        return self._rate if self.deck is None else self.deck.rates[self.slot]
 
-    def __init__(self, translation: str, rate: float = 1) -> None:
-        self.translation = translation
-        self.rate = rate
+    @rate.setter
+    def rate(self, value: float) -> None:
+        if self.deck is None:
+            self._rate = value
+        else:
+            self.deck.rates[self.slot] = value
+
+    @property
+    def schedule(self) -> Schedule | None:
+        return self._schedule if self.deck is None else self.deck.schedules[self.slot]
+
+    @schedule.setter
+    def schedule(self, value: Schedule | None) -> None:
+        if self.deck is None:
+            self._schedule = value
+        else:
+            self.deck.schedules[self.slot] = value
+
+    def dump(self) -> dict:
+        """The record as stored in a JSON deck, with the schedule fields only once it has one."""
+        dumped = {'translation': self.translation, 'rate': self.rate}
+        if self.schedule is not None:
+            dumped.update(self.schedule._asdict())
+        return dumped
+
+    @staticmethod
+    def schedule_of(dumped: dict) -> Schedule | None:
+        return Schedule(dumped['due'], dumped['interval'], dumped['ease']) if 'due' in dumped else None
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Record):
+            return NotImplemented
+        return (self.translation, self.rate) == (other.translation, other.rate)
+
+    def __repr__(self) -> str:
+        schedule = '' if self.schedule is None else f', schedule={self.schedule!r}'
+        return f'Record(translation={self.translation!r}, rate={self.rate!r}{schedule})'
+
+
+class Deck(MutableMapping):
+    """Columnar record store: phrases, translations, rates and schedules in parallel columns addressed by slot.
+
+    Slots of deleted records are reused by the next new phrases, so a Record view is only valid while its phrase is.
+    A translation left as None is decoded on first access through `lazy`.
+    """
+
+    def __init__(
+        self,
+        phrases: Iterable[str] = (),
+        translations: Iterable[str | None] = (),
+        rates: Iterable[float] = (),
+        schedules: Iterable[Schedule | None] | None = None,
+    ) -> None:
+        self.phrases: list[str | None] = list(phrases)
+        self.translations: list[str | None] = list(translations)
+        self.rates = rates if isinstance(rates, array) else array('d', rates)
+        self.schedules: list[Schedule | None] = [None] * len(self.phrases) if schedules is None else list(schedules)
+        self.slots = {k: i for i, k in enumerate(self.phrases)}
+        self.free: list[int] = []  # slots of deleted records
+        self.lazy: Callable[[int], str] | None = None
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.slots)
+
+    def __contains__(self, key) -> bool:
+        return key in self.slots
+
+    def __getitem__(self, key: str) -> Record:
+        return Record.view(self, self.slots[key])
+
+    def __setitem__(self, key: str, record: Record) -> None:
+        translation, rate, schedule = record.translation, record.rate, record.schedule
+        slot = self.slots.get(key)
+        if slot is None and not self.free:
+            self.slots[key] = len(self.phrases)
+            self.phrases.append(key)
+            self.translations.append(translation)
+            self.rates.append(rate)
+            self.schedules.append(schedule)
+        else:
+            if slot is None:
+                slot = self.slots[key] = self.free.pop()
+                self.phrases[slot] = key
+            self.translations[slot] = translation
+            self.rates[slot] = rate
+            self.schedules[slot] = schedule
+
+    def __delitem__(self, key: str) -> None:
+        slot = self.slots.pop(key)
+        self.phrases[slot] = None
+        self.translations[slot] = None
+        self.rates[slot] = 0.0
+        self.schedules[slot] = None
+        self.free.append(slot)
+
+    def pop(self, key: str, *default) -> Record:
+        if key not in self.slots and default:
+            return default[0]
+        record = self.copy(key)
+        del self[key]
+        return record
+
+    def dump(self) -> dict[str, dict]:
+        return {key: Record.view(self, slot).dump() for key, slot in self.slots.items()}
+
+    def copy(self, key: str) -> Record:
+        """A standalone copy of a record, which unlike a view stays valid after its slot is reused."""
+        view = self[key]
+        return Record(view.translation, view.rate, view.schedule)
+
+    def translation(self, slot: int) -> str:
+        translation = self.translations[slot]
+        if translation is None and self.lazy is not None:
+            translation = self.translations[slot] = self.lazy(slot)
+        return translation
 
 
 class RecordEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, Record):
-            return obj.__dict__
+            return obj.dump()
+        if isinstance(obj, Deck):
+            return dict(obj.items())
         return json.JSONEncoder.default(self, obj)
 
 
+class Sampler:
+    """Fenwick tree over record rates: O(log n) weighted draws and point updates."""
+
+    def __init__(self, keys: Iterable[str | None] = (), weights: Iterable[float] = ()) -> None:
+        # Built straight from the Deck columns, so sampler slots start out equal to record slots
+        self.keys: list[str | None] = list(keys)
+        self.weights: list[float] = list(weights)
+        self.slots: dict[str, int] = {k: i for i, k in enumerate(self.keys) if k is not None}
+        self.free: list[int] = []
+        self._build(max(16, len(self.keys)))
+
+    def _build(self, capacity: int) -> None:
+        self.free += range(capacity - 1, len(self.keys) - 1, -1)
+        self.keys += [None] * (capacity - len(self.keys))
+        self.weights += [0.0] * (capacity - len(self.weights))
+        self.tree = [0.0] + self.weights
+        # Level by level, each node of span `step` is added into its parent in one slice operation
+        step = 1
+        while step < capacity:
+            parents = slice(2 * step, None, 2 * step)
+            self.tree[parents] = map(operator.add, self.tree[parents], self.tree[step :: 2 * step])
+            step *= 2
+        self.top_bit = 1 << (capacity.bit_length() - 1)
+
+    def _add(self, slot: int, delta: float) -> None:
+        i = slot + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def total(self) -> float:
+        total = 0.0
+        i = len(self.weights)
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def update(self, key: str, weight: float) -> None:
+        slot = self.slots.get(key)
+        if slot is None:
+            if not self.free:
+                self._build(len(self.weights) * 2)
+            slot = self.free.pop()
+            self.slots[key] = slot
+            self.keys[slot] = key
+        self._add(slot, weight - self.weights[slot])
+        self.weights[slot] = weight
+
+    def remove(self, key: str) -> None:
+        slot = self.slots.pop(key)
+        self._add(slot, -self.weights[slot])
+        self.weights[slot] = 0.0
+        self.keys[slot] = None
+        self.free.append(slot)
+
+    def sample(self) -> str | None:
+        if not self.slots:
+            return None
+        while True:
+            total = self.total()
+            if total <= 0:
+                return random.choice(list(self.slots))
+            rnd = random.random() * total
+            pos = 0
+            step = self.top_bit
+            while step:
+                if pos + step < len(self.tree) and self.tree[pos + step] <= rnd:
+                    pos += step
+                    rnd -= self.tree[pos]
+                step >>= 1
+            # Float drift can land the descent on an empty slot; just draw again
+            if pos < len(self.keys) and self.keys[pos] is not None:
+                return self.keys[pos]
+
+
+class Scheduler:
+    """SM-2 style review queue: a heap of (due, phrase) whose entries outdated by a later review are dropped when reached."""
+
+    day = 86400.0
+    relearn = 10 / 1440  # days until a missed phrase comes back
+    max_initial = 60.0
+
+    def __init__(self, deck: Deck) -> None:
+        self.deck = deck
+        self.heap = [(schedule.due, k) for k, schedule in zip(deck.phrases, deck.schedules) if k is not None and schedule is not None]
+        heapq.heapify(self.heap)
+
+    @staticmethod
+    def initial(key: str, rate: float, now: float) -> Schedule:
+        """A first schedule from the rate a phrase earned in weighted mode, where a low rate means a well known phrase."""
+        interval = min(Scheduler.max_initial, 1 / rate) if rate > 0 else Scheduler.max_initial
+        ease = 2.5 if rate <= 1 else max(1.3, 2.5 - 0.2 * math.log(rate, 1.25))
+        # Phrases with equal intervals are spread over the second half of it, the same way on every run
+        fuzz = 0.5 + zlib.crc32(key.encode()) % 1000 / 2000
+        return Schedule(now + interval * fuzz * Scheduler.day, interval, ease)
+
+    @staticmethod
+    def review(schedule: Schedule, correct: bool, now: float) -> Schedule:
+        if not correct:
+            return Schedule(now + Scheduler.relearn * Scheduler.day, Scheduler.relearn, max(1.3, schedule.ease - 0.2))
+        if schedule.interval < 1:
+            interval = 1.0
+        elif schedule.interval < 6:
+            interval = 6.0
+        else:
+            interval = schedule.interval * schedule.ease
+        return Schedule(now + interval * Scheduler.day, interval, schedule.ease)
+
+    def push(self, key: str, schedule: Schedule) -> None:
+        heapq.heappush(self.heap, (schedule.due, key))
+
+    def next(self, now: float) -> str | None:
+        """The most overdue phrase, or None if nothing is due yet."""
+        while self.heap and self.heap[0][0] <= now:
+            due, key = self.heap[0]
+            slot = self.deck.slots.get(key)
+            if slot is not None and self.deck.schedules[slot] is not None and self.deck.schedules[slot].due == due:
+                return key
+            heapq.heappop(self.heap)
+        return None
+
+
+class SearchIndex:
+    """Trigram inverted index over lowercased phrases and translations.
+
+    Queries shorter than a trigram are answered from a sorted list of word prefixes instead.
+    The index is built from the deck on the first query, or shard by shard through `building`, so loading a deck
+    does not read every translation up front.
+    """
+
+    def __init__(self, data: dict[str, Record] | None = None, grams: bool = True) -> None:
+        self.data = {} if data is None else data
+        self.docs: dict[str, tuple[str, str]] = {}
+        self.use_grams = grams
+        self.grams: dict[str, set[str]] = {}
+        self.words: list[tuple[str, int, str]] = []
+        self.pending: list[str] | None = None  # keys left to index once a build has started
+        self.built = False
+
+    def build(self) -> None:
+        for _ in self.building():
+            pass
+
+    def building(self, shard: int = 500) -> Iterator[None]:
+        """Index the deck `shard` keys at a time, yielding after each; an abandoned build resumes where it stopped."""
+        if self.pending is None:
+            self.pending = list(self.data)
+        while self.pending:
+            for key in self.pending[-shard:]:
+                if key in self.data:
+                    self._index(key, self.data[key].translation, bulk=True)
+            del self.pending[-shard:]
+            yield
+        if not self.built:
+            self.words.sort()
+            self.built = True
+
+    def _index(self, key: str, translation: str, bulk: bool = False) -> None:
+        doc = (key.lower(), translation.lower())
+        self.docs[key] = doc
+        for text in doc if self.use_grams else ():
+            for i in range(len(text) - 2):
+                self.grams.setdefault(text[i : i + 3], set()).add(key)
+        for field, text in enumerate(doc):
+            for word in set(text.split()):
+                if bulk:
+                    self.words.append((word, field, key))
+                else:
+                    bisect.insort(self.words, (word, field, key))
+
+    def add(self, key: str, translation: str) -> None:
+        # Before the build starts the key is picked up from the deck by it, during the build it is finished first
+        if self.pending is None:
+            return
+        self.build()
+        if key in self.docs:
+            self.remove(key)
+        self._index(key, translation)
+
+    def remove(self, key: str) -> None:
+        if self.pending is None:
+            return
+        self.build()
+        doc = self.docs.pop(key)
+        for text in doc if self.use_grams else ():
+            for i in range(len(text) - 2):
+                postings = self.grams.get(text[i : i + 3])
+                if postings is not None:
+                    postings.discard(key)
+                    if not postings:
+                        del self.grams[text[i : i + 3]]
+        for field, text in enumerate(doc):
+            for word in set(text.split()):
+                i = bisect.bisect_left(self.words, (word, field, key))
+                if i < len(self.words) and self.words[i] == (word, field, key):
+                    del self.words[i]
+
+    def matches(self, key: str, query: str, translations: bool = True) -> bool:
+        if not self.built:
+            self.build()
+        phrase, translation = self.docs[key]
+        return query in phrase or translations and query in translation
+
+    def search(self, query: str, translations: bool = True) -> list[str]:
+        """Return keys whose phrase (or translation, if enabled) contains the query."""
+        query = query.lower()
+        keys, exact = self.candidates(query, translations)
+        return list(keys) if exact else [k for k in keys if self.matches(k, query, translations)]
+
+    def candidates(self, query: str, translations: bool = True) -> tuple[Iterable[str], bool]:
+        """Distinct keys that may contain the lowercased query, and whether they all do without checking `matches`."""
+        if not self.built:
+            self.build()
+        if len(query) < 3:
+            if not query or query.split() != [query]:
+                return list(self.docs), False
+            return self._prefixed(query, 2 if translations else 1), True
+        postings = []
+        for i in range(len(query) - 2):
+            gram = self.grams.get(query[i : i + 3])
+            if gram is None:
+                return [], True
+            postings.append(gram)
+        postings.sort(key=len)
+        return postings[0].intersection(*postings[1:]), False
+
+    def _prefixed(self, prefix: str, fields: int) -> Iterator[str]:
+        seen = set()
+        i = bisect.bisect_left(self.words, (prefix,))
+        while i < len(self.words) and self.words[i][0].startswith(prefix):
+            word, field, key = self.words[i]
+            if field < fields and key not in seen:
+                seen.add(key)
+                yield key
+            i += 1
+
+
+class SearchCursor:
+    """Stack of (query, keys) pairs for one search session.
+
+    Every query of a trigram or longer only narrows the keys found for its longest cached prefix,
+    and erasing characters pops back to the cached result. Any DB mutation drops the stack.
+    """
+
+    shard_size = 5_000
+
+    def __init__(self, translations: bool = True) -> None:
+        self.translations = translations
+        self.stack: list[tuple[str, list[str]]] = []
+        self.generation = Decks.active.generation
+
+    def reset(self) -> None:
+        self.stack.clear()
+
+    def search(self, query: str) -> list[str]:
+        for _ in self.searching(query):
+            pass
+        return self.stack[-1][1]
+
+    def searching(self, query: str) -> Iterator[None]:
+        """Run `search`, yielding after every `shard_size` candidates checked, and return its result."""
+        query = query.lower()
+        if self.generation != Decks.active.generation:
+            self.stack.clear()
+            self.generation = Decks.active.generation
+        while self.stack and not query.startswith(self.stack[-1][0]):
+            self.stack.pop()
+        if self.stack and self.stack[-1][0] == query:
+            return self.stack[-1][1]
+        index = Decks.active.index
+        if self.stack and len(self.stack[-1][0]) >= 3:
+            candidates, exact = self.stack[-1][1], False
+        else:
+            candidates, exact = index.candidates(query, self.translations)
+        candidates = iter(candidates)
+        keys = []
+        while shard := list(itertools.islice(candidates, SearchCursor.shard_size)):
+            keys += shard if exact else [k for k in shard if index.matches(k, query, self.translations)]
+            yield
+        self.stack.append((query, keys))
+        return keys
+
+
+class FuzzyIndex:
+    """Trie over the words of phrases and translations answering edit distance queries.
+
+    A lookup walks the trie with one Levenshtein row per node, which is a Levenshtein automaton run over every
+    indexed word at once, and abandons a branch as soon as its row exceeds the allowed distance.
+    The trie is built from the deck on the first search, or shard by shard through `building`. Each query is also looked up in its en2ru and ru2en forms,
+    which finds words typed on the wrong layout without storing every word twice.
+    """
+
+    def __init__(self, data: Deck | None = None) -> None:
+        self.data = Deck() if data is None else data
+        self.root: dict[str, dict] = {}  # char -> child, '' -> the word ending here
+        self.postings: dict[str, set[str]] = {}
+        self.docs: dict[str, set[str]] = {}
+        self.pending: list[str] | None = None  # keys left to index once a build has started
+        self.built = False
+
+    def build(self) -> None:
+        for _ in self.building():
+            pass
+
+    def building(self, shard: int = 1_000) -> Iterator[None]:
+        """Index the deck `shard` keys at a time, yielding after each; an abandoned build resumes where it stopped."""
+        if self.pending is None:
+            self.pending = list(self.data)
+        while self.pending:
+            for key in self.pending[-shard:]:
+                if key in self.data:
+                    self.add(key, self.data[key].translation)
+            del self.pending[-shard:]
+            yield
+        self.built = True
+
+    def add(self, key: str, translation: str) -> None:
+        if self.pending is None:
+            return
+        if key in self.docs:
+            self.remove(key)
+        self.docs[key] = set(f'{key} {translation}'.lower().split())
+        for word in self.docs[key]:
+            if word not in self.postings:
+                self.postings[word] = set()
+                node = self.root
+                for c in word:
+                    node = node.setdefault(c, {})
+                node[''] = word
+            self.postings[word].add(key)
+
+    def remove(self, key: str) -> None:
+        for word in self.docs.pop(key, ()):
+            self.postings[word].discard(key)
+
+    def lookup(self, word: str, k: int, nodes: int = 1_000) -> Iterator[None]:
+        """Find the indexed words within k edits of `word`, yielding after every `nodes` trie nodes walked,
+        and return them with their distances."""
+        found = {}
+        stack = [(c, child, range(len(word) + 1)) for c, child in self.root.items() if c]
+        walked = 0
+        while stack:
+            walked += 1
+            if walked % nodes == 0:
+                yield
+            c, node, previous = stack.pop()
+            current = [previous[0] + 1]
+            for j, wc in enumerate(word, 1):
+                current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (wc != c)))
+            if current[-1] <= k and '' in node:
+                found[node['']] = current[-1]
+            if min(current) <= k:
+                stack.extend((c, child, current) for c, child in node.items() if c)
+        return found
+
+    def search(self, query: str) -> list[str]:
+        """Keys with a close match for every query word of 3+ letters in any layout, closest first.
+
+        A word of up to 5 letters may be 1 edit away, a longer one 2 edits.
+        """
+        steps = self.searching(query)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as done:
+                return done.value
+
+    def searching(self, query: str) -> Iterator[None]:
+        """Run `search`, yielding while the trie is built or walked, and return its result."""
+        yield from self.building()
+        query = query.lower()
+        best: dict[str, int] = {}
+        for form in {query, ''.join(en2ru.get(c, c) for c in query), ''.join(ru2en.get(c, c) for c in query)}:
+            scores: dict[str, int] | None = None
+            for word in (word for word in form.split() if len(word) >= 3):
+                hits: dict[str, int] = {}
+                found = yield from self.lookup(word, 1 if len(word) <= 5 else 2)
+                for term, d in found.items():
+                    for key in self.postings[term]:
+                        hits[key] = min(hits.get(key, d), d)
+                scores = hits if scores is None else {key: scores[key] + d for key, d in hits.items() if key in scores}
+            for key, score in (scores or {}).items():
+                best[key] = min(best.get(key, score), score)
+        return sorted(best, key=lambda key: (best[key], -self.data[key].rate))
+
+
+class Ranker:
+    """Relevance ordering of search hits, shared by add and explore modes.
+
+    An exact match beats a prefix match, which beats a match at a word start, which beats any other substring.
+    At the same level a phrase hit beats a translation hit, and a higher rate breaks the remaining ties.
+    """
+
+    @staticmethod
+    def level(text: str, query: str) -> int:
+        text = text.lower()
+        if text == query:
+            return 3
+        if text.startswith(query):
+            return 2
+        if ' ' + query in text:
+            return 1
+        return 0 if query in text else -1
+
+    @staticmethod
+    def relevance(query: str, translations: bool = True) -> Callable[[str], tuple[int, float]]:
+        """Sort key of a phrase for the query, higher is more relevant."""
+        query = query.lower()
+        deck = Decks.active.data
+
+        def relevance(key: str) -> tuple[int, float]:
+            slot = deck.slots[key]
+            score = 2 * Ranker.level(key, query) + 1
+            if translations:
+                score = max(score, 2 * Ranker.level(deck.translation(slot), query))
+            return score, deck.rates[slot]
+
+        return relevance
+
+    @staticmethod
+    def top(query: str, keys: Iterable[str], k: int, translations: bool = True) -> list[tuple[str, Record]]:
+        """The k most relevant of `keys` with their records, selected with a bounded heap."""
+        deck = Decks.active.data
+        best = heapq.nlargest(k, (key for key in keys if key in deck.slots), key=Ranker.relevance(query, translations))
+        return [(key, deck[key]) for key in best]
+
+
+class JsonBackend:
+    """The deck as one JSON file, plus a journal of mutations that is folded into it once it grows."""
+
+    journal_limit = 1 << 20
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.journal_file = None
+        self.snapshot: Callable[[], dict[str, dict]] | None = None  # set by the owning DB, for compaction
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self) -> Deck:
+        with open(self.path, 'r', encoding='utf-8') as db_file:
+            data = self.decode(json.load(db_file))
+        stale = os.path.exists(self.path + '.journal.old')
+        for journal_path in (self.path + '.journal.old', self.path + '.journal'):
+            self._replay(data, journal_path)
+        if stale:
+            self.save(list(data.items()))
+        return data
+
+    @staticmethod
+    def decode(db_raw: dict[str, dict]) -> Deck:
+        return Deck(
+            db_raw,
+            (v['translation'] for v in db_raw.values()),
+            (v['rate'] for v in db_raw.values()),
+            (Record.schedule_of(v) for v in db_raw.values()),
+        )
+
+    @staticmethod
+    def _replay(data: Deck, journal_path: str) -> set[str]:
+        """Apply a journal to the deck, returning the phrases that were set or deleted by it."""
+        touched = set()
+        try:
+            with open(journal_path, 'r', encoding='utf-8') as journal_file:
+                for line in journal_file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # torn write at the tail, everything after it is lost anyway
+                    if entry['op'] == 'set':
+                        data[entry['key']] = Record(entry['translation'], entry['rate'], Record.schedule_of(entry))
+                        touched.add(entry['key'])
+                    elif entry['op'] == 'del':
+                        data.pop(entry['key'], None)
+                        touched.add(entry['key'])
+                    elif entry['op'] == 'rate' and entry['key'] in data:
+                        data[entry['key']].rate = entry['rate']
+                    elif entry['op'] == 'review' and entry['key'] in data:
+                        data[entry['key']].rate = entry['rate']
+                        data[entry['key']].schedule = Record.schedule_of(entry)
+        except FileNotFoundError:
+            pass
+        return touched
+
+    def append(self, entries: list[dict]) -> None:
+        if self.journal_file is None:
+            self.journal_file = open(self.path + '.journal', 'a', encoding='utf-8')
+        self.journal_file.write(''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries))
+        self.journal_file.flush()
+        if self.journal_file.tell() > self.journal_limit:
+            self._compact()
+
+    def _compact(self) -> None:
+        # The journal is rotated first: mutations queued from now on go to a fresh file,
+        # and replaying them over the snapshot taken below is harmless since every entry is absolute.
+        self.journal_file.close()
+        self.journal_file = None
+        os.replace(self.path + '.journal', self.path + '.journal.old')
+        self._dump(self.snapshot())
+        os.remove(self.path + '.journal.old')
+
+    def save(self, items: list[tuple[str, Record]]) -> None:
+        snapshot = {k: v.dump() for k, v in items}
+        self.close()
+        self._dump(snapshot)
+        for journal_path in (self.path + '.journal.old', self.path + '.journal'):
+            if os.path.exists(journal_path):
+                os.remove(journal_path)
+
+    def _dump(self, snapshot: dict[str, dict]) -> None:
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as db_file:
+            json.dump(snapshot, db_file, ensure_ascii=False, indent=4)
+            db_file.flush()
+            os.fsync(db_file.fileno())
+        os.replace(self.path + '.tmp', self.path)
+
+    def close(self) -> None:
+        if self.journal_file is not None:
+            self.journal_file.close()
+            self.journal_file = None
+
+
+class SqliteBackend:
+    """Records in a local SQLite file, written with per-record upserts.
+
+    The file lives next to `db-path` and is created from that JSON deck on first use.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS records (
+            phrase TEXT PRIMARY KEY, translation TEXT NOT NULL, rate REAL NOT NULL, due REAL, interval REAL, ease REAL
+        );
+        CREATE INDEX IF NOT EXISTS records_rate ON records (rate);
+    """
+    fts_schema = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5(
+            phrase, translation, content='records', tokenize='trigram'
+        );
+        CREATE TRIGGER IF NOT EXISTS records_ai AFTER INSERT ON records BEGIN
+            INSERT INTO records_fts (rowid, phrase, translation) VALUES (new.rowid, new.phrase, new.translation);
+        END;
+        CREATE TRIGGER IF NOT EXISTS records_ad AFTER DELETE ON records BEGIN
+            INSERT INTO records_fts (records_fts, rowid, phrase, translation) VALUES ('delete', old.rowid, old.phrase, old.translation);
+        END;
+        CREATE TRIGGER IF NOT EXISTS records_au AFTER UPDATE OF phrase, translation ON records BEGIN
+            INSERT INTO records_fts (records_fts, rowid, phrase, translation) VALUES ('delete', old.rowid, old.phrase, old.translation);
+            INSERT INTO records_fts (rowid, phrase, translation) VALUES (new.rowid, new.phrase, new.translation);
+        END;
+    """
+
+    def __init__(self, path: str) -> None:
+        self.json_path = path
+        self.path = os.path.splitext(path)[0] + '.sqlite3'
+        self.connection: sqlite3.Connection | None = None
+        self.fts = False
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) or os.path.exists(self.json_path)
+
+    def load(self) -> Deck:
+        migrate = not os.path.exists(self.path)
+        if migrate:
+            data = JsonBackend(self.json_path).load()
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.executescript(self.schema)
+        columns = {row[1] for row in self.connection.execute('PRAGMA table_info(records)')}
+        for column in ('due', 'interval', 'ease'):
+            if column not in columns:
+                self.connection.execute(f'ALTER TABLE records ADD COLUMN {column} REAL')
+        fresh = self.connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'records_fts'").fetchone() is None
+        try:
+            self.connection.executescript(self.fts_schema)
+            if fresh:
+                # Rows written before the index existed, or by a SQLite without FTS5, are indexed on its creation
+                with self.connection:
+                    self.connection.execute("INSERT INTO records_fts (records_fts) VALUES ('rebuild')")
+            self.fts = True
+        except sqlite3.OperationalError:
+            pass  # SQLite built without FTS5 or the trigram tokenizer, the in-memory index takes over
+        if migrate:
+            self.save(list(data.items()))
+        rows = self.connection.execute('SELECT phrase, translation, rate, due, interval, ease FROM records').fetchall()
+        return Deck(
+            (row[0] for row in rows),
+            (row[1] for row in rows),
+            (row[2] for row in rows),
+            (None if row[3] is None else Schedule(*row[3:]) for row in rows),
+        )
+
+    def append(self, entries: list[dict]) -> None:
+        with self.connection:
+            for entry in entries:
+                if entry['op'] == 'set':
+                    self.connection.execute(
+                        'INSERT INTO records (phrase, translation, rate, due, interval, ease) VALUES (?, ?, ?, ?, ?, ?)'
+                        ' ON CONFLICT (phrase) DO UPDATE SET translation = excluded.translation, rate = excluded.rate,'
+                        ' due = excluded.due, interval = excluded.interval, ease = excluded.ease',
+                        (entry['key'], entry['translation'], entry['rate'], entry.get('due'), entry.get('interval'), entry.get('ease')),
+                    )
+                elif entry['op'] == 'del':
+                    self.connection.execute('DELETE FROM records WHERE phrase = ?', (entry['key'],))
+                elif entry['op'] == 'rate':
+                    self.connection.execute('UPDATE records SET rate = ? WHERE phrase = ?', (entry['rate'], entry['key']))
+                elif entry['op'] == 'review':
+                    self.connection.execute(
+                        'UPDATE records SET rate = ?, due = ?, interval = ?, ease = ? WHERE phrase = ?',
+                        (entry['rate'], entry['due'], entry['interval'], entry['ease'], entry['key']),
+                    )
+
+    def save(self, items: list[tuple[str, Record]]) -> None:
+        with self.connection:
+            self.connection.execute('DELETE FROM records')
+            self.connection.executemany(
+                'INSERT INTO records (phrase, translation, rate, due, interval, ease) VALUES (?, ?, ?, ?, ?, ?)',
+                ((k, v.translation, v.rate, *(v.schedule or (None, None, None))) for k, v in items),
+            )
+
+    def search(self, query: str, translations: bool = True) -> list[str]:
+        match = '"' + query.replace('"', '""') + '"'
+        if not translations:
+            match = 'phrase : ' + match
+        return [row[0] for row in self.connection.execute('SELECT phrase FROM records_fts WHERE records_fts MATCH ?', (match,))]
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class BinaryBackend(JsonBackend):
+    """Fixed-width record table with offsets into a UTF-8 string heap, float64 rate and schedule columns, opened with mmap.
+
+    The file lives next to `db-path` and is created from that JSON deck on first use. Rates and schedules of mapped
+    records are written in place, every other mutation goes to the journal until the next compaction rewrites the file.
+    Version 1 files, which have no schedule column, are still read and get one on their next rewrite.
+    """
+
+    magic = b'TDCK'
+    version = 2
+    # magic, version, record count; the rate column and the (due, interval, ease) column follow in native byte order
+    header = struct.Struct('<4sIQ')
+    entry = struct.Struct('<QIQI')  # phrase offset and length, translation offset and length, relative to the heap
+    phrase_entry = struct.Struct('<QI12x')
+
+    def __init__(self, path: str) -> None:
+        super().__init__(os.path.splitext(path)[0] + '.tdeck')
+        self.json_path = path
+        self.map: mmap.mmap | None = None
+        self.rates: memoryview | None = None
+        self.schedules: memoryview | None = None
+        # Mapped slot of each phrase: the deck's own slot map right after a load, as it is built in file order.
+        # Phrases in `replaced` were set or deleted since and no longer own the record in their mapped slot.
+        self.slots: dict[str, int] = {}
+        self.replaced: set[str] = set()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) or os.path.exists(self.json_path)
+
+    def load(self) -> Deck:
+        if os.path.exists(self.path):
+            self._map()
+        else:
+            self._dump({k: v.dump() for k, v in JsonBackend(self.json_path).load().items()})
+        count = len(self.rates)
+        table_start, heap_start = self._bounds()
+        # Phrases are decoded up front since the deck is keyed by them, translations only once they are read
+        heap = self.map[heap_start:]
+        phrases = [str(heap[offset : offset + length], 'utf-8') for offset, length in self.phrase_entry.iter_unpack(self.map[table_start:heap_start])]
+        del heap
+        rates = array('d')
+        rates.frombytes(self.map[self.header.size : self.header.size + 8 * count])
+        schedules = None
+        if self.schedules is not None:
+            column = self.schedules
+            schedules = [Schedule(*column[3 * slot : 3 * slot + 3]) if column[3 * slot] else None for slot in range(count)]
+        data = Deck(phrases, [None] * count, rates, schedules)
+        data.lazy = functools.partial(self._decode, self.map, table_start, heap_start)
+        self.slots = data.slots
+        stale = os.path.exists(self.path + '.journal.old')
+        self.replaced = set()
+        for journal_path in (self.path + '.journal.old', self.path + '.journal'):
+            self.replaced |= self._replay(data, journal_path)
+        if stale:
+            self.save(list(data.items()))
+        return data
+
+    def _bounds(self) -> tuple[int, int]:
+        """Offsets of the record table and the string heap in the mapped file."""
+        count = len(self.rates)
+        table_start = self.header.size + 8 * count + (0 if self.schedules is None else 24 * count)
+        return table_start, table_start + self.entry.size * count
+
+    def _slot(self, key: str) -> int | None:
+        """Mapped slot that still holds the record of `key`, if any."""
+        slot = self.slots.get(key)
+        if slot is None or key in self.replaced or slot >= len(self.rates):
+            return None
+        # The deck reuses the slots of deleted phrases, so a shared slot map can point at another phrase's record
+        table_start, heap_start = self._bounds()
+        offset, length = self.phrase_entry.unpack_from(self.map, table_start + self.entry.size * slot)
+        return slot if self.map[heap_start + offset : heap_start + offset + length] == key.encode('utf-8') else None
+
+    def _decode(self, heap: mmap.mmap, table_start: int, heap_start: int, slot: int) -> str:
+        _, _, tr_offset, tr_length = self.entry.unpack_from(heap, table_start + self.entry.size * slot)
+        return str(heap[heap_start + tr_offset : heap_start + tr_offset + tr_length], 'utf-8')
+
+    def _map(self) -> None:
+        with open(self.path, 'r+b') as db_file:
+            self.map = mmap.mmap(db_file.fileno(), 0)
+        magic, version, count = self.header.unpack_from(self.map)
+        if magic != self.magic or version not in (1, self.version):
+            raise ValueError(f'{self.path} is not a binary deck')
+        start = self.header.size + 8 * count
+        self.rates = memoryview(self.map)[self.header.size : start].cast('d')
+        self.schedules = memoryview(self.map)[start : start + 24 * count].cast('d') if version > 1 else None
+
+    def append(self, entries: list[dict]) -> None:
+        journal = []
+        in_place = False
+        for entry in entries:
+            slot = self._slot(entry['key'])
+            if entry['op'] == 'rate' and slot is not None:
+                self.rates[slot] = entry['rate']
+                in_place = True
+            elif entry['op'] == 'review' and slot is not None and self.schedules is not None:
+                self.rates[slot] = entry['rate']
+                self.schedules[3 * slot : 3 * slot + 3] = array('d', (entry['due'], entry['interval'], entry['ease']))
+                in_place = True
+            else:
+                # Later in-place writes for this phrase would be overridden by this entry on replay
+                self.replaced.add(entry['key'])
+                journal.append(entry)
+        if in_place:
+            self.map.flush()
+        if journal:
+            super().append(journal)
+
+    def _dump(self, snapshot: dict[str, dict]) -> None:
+        keys = list(snapshot)
+        table = bytearray()
+        heap = bytearray()
+        for key in keys:
+            key_bytes = key.encode('utf-8')
+            tr_bytes = snapshot[key]['translation'].encode('utf-8')
+            table += self.entry.pack(len(heap), len(key_bytes), len(heap) + len(key_bytes), len(tr_bytes))
+            heap += key_bytes + tr_bytes
+        with open(self.path + '.tmp', 'wb') as db_file:
+            db_file.write(self.header.pack(self.magic, self.version, len(keys)))
+            db_file.write(array('d', (snapshot[k]['rate'] for k in keys)).tobytes())
+            fields = ('due', 'interval', 'ease')
+            db_file.write(array('d', (snapshot[k].get(field, 0.0) for k in keys for field in fields)).tobytes())
+            db_file.write(table)
+            db_file.write(heap)
+            db_file.flush()
+            os.fsync(db_file.fileno())
+        # The snapshot has decoded every live translation, so nothing reads the old map anymore;
+        # it is closed first because a mapped file cannot be replaced on Windows
+        self._unmap()
+        try:
+            os.replace(self.path + '.tmp', self.path)
+        finally:
+            self._map()
+        self.slots = {k: slot for slot, k in enumerate(keys)}
+        self.replaced = set()
+
+    def close(self) -> None:
+        super().close()
+        self._unmap()
+
+    def _unmap(self) -> None:
+        for view in (self.rates, self.schedules):
+            if view is not None:
+                view.release()
+        self.rates = self.schedules = None
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+
+class SqliteIndex(SearchIndex):
+    """Trigram queries go to the FTS5 table of the SQLite backend, only word prefixes are kept in memory."""
+
+    def __init__(self, backend: SqliteBackend, data: dict[str, Record]) -> None:
+        super().__init__(data, grams=False)
+        self.backend = backend
+        self.recent: set[str] = set()  # added this session, possibly not written by Autosave yet
+
+    def add(self, key: str, translation: str) -> None:
+        super().add(key, translation)
+        self.recent.add(key)
+
+    def candidates(self, query: str, translations: bool = True) -> tuple[Iterable[str], bool]:
+        if len(query) < 3:
+            return super().candidates(query, translations)
+        if not self.built:
+            self.build()
+        return [k for k in self.recent.union(self.backend.search(query, translations)) if k in self.docs], False
+
+
+class Autosave:
+    """Writer thread of a deck that coalesces bursts of its mutations into a single backend write."""
+
+    debounce = 0.5
+    enabled = True
+
+    def __init__(self, db: 'DB') -> None:
+        self.db = db
+        self.debounce = Autosave.debounce
+        self.pending: list[dict] = []
+        self.last_change = 0.0
+        self.dirty = threading.Event()
+        self.write_lock = threading.Lock()
+        self.thread: threading.Thread | None = None
+        self.stopped = False
+        self.error: str | None = None
+
+    def notify(self, entry: dict) -> None:
+        # Called under the deck's lock, so entries are queued in the same order the mutations happened
+        if not Autosave.enabled:
+            return
+        self.pending.append(entry)
+        self.last_change = time.monotonic()
+        self.dirty.set()
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def _run(self) -> None:
+        while not self.stopped:
+            self.dirty.wait()
+            while (delay := self.last_change + self.debounce - time.monotonic()) > 0:
+                time.sleep(delay)
+            self.dirty.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # The entries stay queued and the thread lives on, so the next mutation or DB.close retries the write
+                self.error = f'{type(e).__name__}: {e}'
+                Runtime.post_redraw()
+            else:
+                self.error = None
+
+    def flush(self) -> None:
+        with self.write_lock:
+            with self.db.lock:
+                entries, self.pending = self.pending, []
+            if entries:
+                try:
+                    with Perf.phase('save'):
+                        self.db.backend.append(entries)
+                except BaseException:
+                    with self.db.lock:
+                        self.pending[:0] = entries
+                    raise
+                self.db.snapshots.note(len(entries))
+
+    def stop(self) -> None:
+        self.stopped = True
+        self.dirty.set()
+
+
+class Snapshots:
+    """Gzipped copies of a deck in a snapshots/ directory next to it, named <deck>-<local time>.json.gz.
+
+    The Autosave thread takes one after `changes` mutations, or after `interval` seconds since the last one if anything
+    changed at all. Each new snapshot prunes the old ones down to the newest `keep['last']`, plus the newest one of each
+    of the last `keep['hourly']` hours and `keep['daily']` days that have one.
+    """
+
+    changes = 500
+    interval = 3600.0
+    keep = {'last': 10, 'hourly': 24, 'daily': 30}
+
+    def __init__(self, db: 'DB') -> None:
+        self.db = db
+        self.directory = os.path.join(os.path.dirname(db.config['db-path']), 'snapshots')
+        self.prefix = db.name  # decks may share a directory and even a file name, never a name
+        self.changes = int(db.config.get('snapshot-changes', Snapshots.changes))
+        self.interval = float(db.config.get('snapshot-interval', Snapshots.interval))
+        self.keep = {**Snapshots.keep, **db.config.get('snapshot-keep', {})}
+        self.pending = 0
+        snapshots = self.paths()
+        self.last = Snapshots.taken_at(snapshots[0]) if snapshots else 0.0
+
+    def paths(self) -> list[str]:
+        """Paths of this deck's snapshots, newest first."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        pattern = re.compile(re.escape(self.prefix) + r'-\d{8}-\d{6}\.json\.gz')
+        return [os.path.join(self.directory, name) for name in sorted(filter(pattern.fullmatch, names), reverse=True)]
+
+    @staticmethod
+    def taken_at(path: str) -> float:
+        return time.mktime(time.strptime(os.path.basename(path)[-23:-8], '%Y%m%d-%H%M%S'))
+
+    def note(self, count: int) -> None:
+        self.pending += count
+        if 0 < self.changes <= self.pending or time.time() - self.last >= self.interval:
+            self.take()
+
+    def take(self) -> str:
+        with Perf.phase('snapshot'):
+            with self.db.lock:
+                snapshot = self.db.data.dump()
+                self.pending = 0
+            now = time.time()
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f'{self.prefix}-{time.strftime("%Y%m%d-%H%M%S", time.localtime(now))}.json.gz')
+            with gzip.open(path + '.tmp', 'wt', encoding='utf-8', compresslevel=6) as snapshot_file:
+                json.dump(snapshot, snapshot_file, ensure_ascii=False, separators=(',', ':'))
+            os.replace(path + '.tmp', path)
+            self.last = now
+            self.prune()
+        return path
+
+    def prune(self) -> None:
+        snapshots = self.paths()
+        kept = set(snapshots[: self.keep['last']])
+        for period, fmt in (('hourly', '%Y%m%d%H'), ('daily', '%Y%m%d')):
+            seen: set[str] = set()
+            for path in snapshots:
+                bucket = time.strftime(fmt, time.localtime(Snapshots.taken_at(path)))
+                if bucket not in seen and len(seen) < self.keep[period]:
+                    seen.add(bucket)
+                    kept.add(path)
+        for path in snapshots:
+            if path not in kept:
+                os.remove(path)
+
+    @staticmethod
+    def read(path: str) -> Deck:
+        with gzip.open(path, 'rt', encoding='utf-8') as snapshot_file:
+            return JsonBackend.decode(json.load(snapshot_file))
+
+
+class Config:
+    """config.json, parsed and validated once and read again only after the file changes."""
+
+    path = 'config.json'
+    types: dict[str, type | tuple[type, ...]] = {
+        'db-path': str,
+        'db-backend': str,
+        'autosave-debounce': (int, float),
+        'perf': bool,
+        'perf-trace': str,
+        'scheduler': str,
+        'snapshot-changes': int,
+        'snapshot-interval': (int, float),
+        'snapshot-keep': dict,
+        'decks': dict,
+        'deck': str,
+        'memory-budget': (int, float),
+    }
+    # Settings a "decks" entry may override, the others apply to the whole app
+    deck_settings = ('db-path', 'db-backend', 'autosave-debounce', 'scheduler', 'snapshot-changes', 'snapshot-interval', 'snapshot-keep')
+    data: dict[str, Any] = {}
+    stamp: tuple[int, int] | None = None
+
+    @staticmethod
+    def load() -> dict[str, Any]:
+        """The current settings, empty if there is no config file yet. Raises ValueError for invalid ones."""
+        try:
+            stat = os.stat(Config.path)
+        except FileNotFoundError:
+            Config.data, Config.stamp = {}, None
+            return Config.data
+        if (stat.st_mtime_ns, stat.st_size) != Config.stamp:
+            with open(Config.path, 'r', encoding='utf-8') as config_file:
+                data = json.load(config_file)
+            Config.validate(data)
+            Config.data, Config.stamp = data, (stat.st_mtime_ns, stat.st_size)
+        return Config.data
+
+    @staticmethod
+    def decks(config: dict[str, Any]) -> dict[str, dict[str, Any]]:
+        """Settings of each deck by name: the "db-path" deck, named after its file, and the entries of "decks".
+
+        Deck settings an entry leaves out are taken from the top level.
+        """
+        shared = {key: value for key, value in config.items() if key in Config.deck_settings and key != 'db-path'}
+        decks = {}
+        if 'db-path' in config:
+            decks[Config.top_deck(config)] = {**shared, 'db-path': config['db-path']}
+        for name, deck in config.get('decks', {}).items():
+            decks[name] = {**shared, **deck}
+        return decks
+
+    @staticmethod
+    def top_deck(config: dict[str, Any]) -> str:
+        """Name of the "db-path" deck: its file name without the extension."""
+        return os.path.splitext(os.path.basename(config['db-path']))[0]
+
+    @staticmethod
+    def validate(config: dict[str, Any]) -> None:
+        if not isinstance(config, dict):
+            raise ValueError(f'{Config.path} must contain a JSON object')
+        Config._check_types(config)
+        if 'db-path' in config and Config.top_deck(config) in config.get('decks', {}):
+            raise ValueError(f'{Config.path}: deck "{Config.top_deck(config)}" is both the "db-path" deck and an entry of "decks"')
+        for name, deck in config.get('decks', {}).items():
+            # Snapshot file names start with the deck name
+            if not name or '/' in name or '\\' in name:
+                raise ValueError(f'{Config.path}: "{name}" is not a valid deck name')
+            if not isinstance(deck, dict) or not isinstance(deck.get('db-path'), str):
+                raise ValueError(f'{Config.path}: deck "{name}" must be an object with a "db-path"')
+            if not deck.keys() <= set(Config.deck_settings):
+                raise ValueError(f'{Config.path}: deck "{name}" may only set {", ".join(Config.deck_settings)}')
+            Config._check_types(deck)
+        decks = Config.decks(config)
+        if 'deck' in config and config['deck'] not in decks:
+            raise ValueError(f'{Config.path}: "deck" is not one of the configured decks')
+        for settings in decks.values():
+            if settings.get('db-backend', 'json') not in DB.backends:
+                raise ValueError(f'{Config.path}: "db-backend" must be one of {", ".join(DB.backends)}')
+            if settings.get('scheduler', 'weighted') not in ('weighted', 'sm2'):
+                raise ValueError(f'{Config.path}: "scheduler" must be weighted or sm2')
+            for period, count in settings.get('snapshot-keep', {}).items():
+                if period not in Snapshots.keep or not isinstance(count, int) or isinstance(count, bool) or count < 0:
+                    raise ValueError(f'{Config.path}: "snapshot-keep" maps last, hourly and daily to counts')
+
+    @staticmethod
+    def _check_types(settings: dict[str, Any]) -> None:
+        for key, value in settings.items():
+            expected = Config.types.get(key)
+            if expected is None:
+                raise ValueError(f'{Config.path}: unknown setting "{key}"')
+            if not isinstance(value, expected) or isinstance(value, bool) and expected is not bool:
+                raise ValueError(f'{Config.path}: "{key}" has an invalid value {value!r}')
+
+    @staticmethod
+    def save(config: dict[str, Any]) -> None:
+        Config.validate(config)
+        with open(Config.path, 'w', encoding='utf-8') as config_file:
+            json.dump(config, config_file, ensure_ascii=False, indent=4)
+        stat = os.stat(Config.path)
+        Config.data, Config.stamp = config, (stat.st_mtime_ns, stat.st_size)
+
+
 class DB:
-    data: dict[str, Record] = {}
-    init_size: int
+    """One deck: its records, the backend they persist to, the indexes over them and its writer thread."""
+
+    backends = {'json': JsonBackend, 'sqlite': SqliteBackend, 'binary': BinaryBackend}
+    phrase_cost = 2048  # rough resident bytes per phrase with the search index, the fuzzy trie takes about as much again
+
+    def __init__(self, name: str, config: dict[str, Any]) -> None:
+        self.name = name
+        self.config = config
+        self.data = Deck()
+        self.backend: JsonBackend | SqliteBackend | BinaryBackend | None = None
+        self.sampler = Sampler()
+        self.scheduler: Scheduler | None = None
+        self.index = SearchIndex()
+        self.fuzzy = FuzzyIndex()
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.loader: threading.Thread | None = None
+        self.ready = threading.Event()
+        self.error: BaseException | None = None
+        self.progress = ''
+        self.load_time = 0.0
+        self.autosave = Autosave(self)
+        self.snapshots = Snapshots(self)
 
     @staticmethod
-    def load(config: dict[str, str] = None) -> bool:
+    def exists(settings: dict[str, Any]) -> bool:
+        """Whether the file of a deck with these settings is there, asked of its backend without loading anything."""
+        return DB.backends[settings.get('db-backend', 'json')](settings['db-path']).exists()
+
+    def footprint(self) -> int:
+        """Estimated resident bytes, zero until the deck is loaded."""
+        if not self.ready.is_set():
+            return 0
+        return len(self.data) * DB.phrase_cost * (1 if self.fuzzy.pending is None else 2)
+
+    def load(self, index: bool = True) -> bool:
+        config = self.config
         try:
-            if config is None:
-                with open('config.json', 'r', encoding='utf-8') as config_file:
-                    config = json.load(config_file)
-            with open(config['db-path'], 'r', encoding='utf-8') as db_file:
-                db_raw = json.load(db_file)
-            DB.data = {k: Record(v['translation'], v['rate']) for k, v in db_raw.items()}
-            DB.init_size = len(DB.data)
+            backend = DB.backends[config.get('db-backend', 'json')](config['db-path'])
+            backend.snapshot = self.dump
+            self.progress = 'Reading the deck…'
+            self.data = backend.load()
+            self.backend = backend
+            self.autosave.debounce = float(config.get('autosave-debounce', Autosave.debounce))
+            if index:
+                self.progress = f'Indexing {len(self.data)} phrases…'
+                self.sampler = Sampler(self.data.phrases, self.data.rates)
+                self.index = SqliteIndex(backend, self.data) if getattr(backend, 'fts', False) else SearchIndex(self.data)
+                self.fuzzy = FuzzyIndex(self.data)
+            self.scheduler = None
+            if index and config.get('scheduler', 'weighted') == 'sm2':
+                self.progress = 'Scheduling reviews…'
+                now = time.time()
+                deck = self.data
+                unscheduled = [slot for slot, key in enumerate(deck.phrases) if key is not None and deck.schedules[slot] is None]
+                for slot in unscheduled:
+                    deck.schedules[slot] = Scheduler.initial(deck.phrases[slot], deck.rates[slot], now)
+                # Written out right away, unless a replay without --save runs on the deck
+                if unscheduled and Autosave.enabled:
+                    backend.save(list(deck.items()))
+                self.scheduler = Scheduler(deck)
+            self.generation += 1
         except FileNotFoundError:
             return False
         return True
 
+    def load_async(self) -> None:
+        """Start loading the deck on a background thread, see DB.wait."""
+
+        def run() -> None:
+            started = time.monotonic()
+            try:
+                with Perf.phase('load'):
+                    loaded = self.load()
+                if not loaded:
+                    raise FileNotFoundError(self.config['db-path'])
+            except BaseException as e:
+                self.error = e
+            self.load_time = time.monotonic() - started
+            self.ready.set()
+            Runtime.post_redraw()
+
+        self.ready.clear()
+        self.error = None
+        self.loader = threading.Thread(target=run, daemon=True)
+        self.loader.start()
+
+    def wait(self) -> None:
+        self.ready.wait()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def dump(self) -> dict[str, dict]:
+        """The records as stored in a JSON deck, dumped under the lock since views don't survive a slot being reused."""
+        with self.lock:
+            return self.data.dump()
+
+    def save(self) -> None:
+        """Write the whole deck synchronously, folding any queued mutations into it."""
+        with self.autosave.write_lock:
+            with self.lock:
+                self.autosave.pending = []
+                items = [(key, self.data.copy(key)) for key in self.data]
+            self.backend.save(items)
+
+    def close(self) -> None:
+        if self.loader is not None:
+            self.loader.join()
+        self.autosave.stop()
+        if self.backend is None:
+            return
+        self.autosave.flush()
+        with self.autosave.write_lock:
+            self.backend.close()
+
+    def set(self, key: str, record: Record) -> None:
+        if self.scheduler is not None and record.schedule is None:
+            record = Record(record.translation, record.rate, Schedule(time.time(), 0.0, 2.5))
+        with self.lock:
+            self.data[key] = record
+            self.autosave.notify({'op': 'set', 'key': key, **record.dump()})
+        self.sampler.update(key, record.rate)
+        if self.scheduler is not None:
+            self.scheduler.push(key, record.schedule)
+        self.index.add(key, record.translation)
+        self.fuzzy.add(key, record.translation)
+        self.generation += 1
+
+    def delete(self, key: str) -> Record:
+        with self.lock:
+            record = self.data.pop(key)
+            self.autosave.notify({'op': 'del', 'key': key})
+        self.sampler.remove(key)
+        self.index.remove(key)
+        self.fuzzy.remove(key)
+        self.generation += 1
+        return record
+
+    def set_rate(self, key: str, rate: float) -> None:
+        with self.lock:
+            self.data[key].rate = rate
+            self.autosave.notify({'op': 'rate', 'key': key, 'rate': rate})
+        self.sampler.update(key, rate)
+
+    def review(self, key: str, correct: bool) -> None:
+        """Record an answer: scale the rate and, with the scheduler on, move the phrase's due time."""
+        if self.scheduler is None:
+            self.set_rate(key, self.data[key].rate * (0.75 if correct else 1.25))
+            return
+        now = time.time()
+        with self.lock:
+            record = self.data[key]
+            record.rate *= 0.75 if correct else 1.25
+            record.schedule = Scheduler.review(record.schedule or Schedule(now, 0.0, 2.5), correct, now)
+            self.autosave.notify({'op': 'review', 'key': key, 'rate': record.rate, **record.schedule._asdict()})
+            rate, schedule = record.rate, record.schedule
+        self.sampler.update(key, rate)
+        self.scheduler.push(key, schedule)
+
+
+class Decks:
+    """The decks of the config, each loaded on first use, and the one the UI works on.
+
+    Once the resident decks are estimated to take more than "memory-budget" MiB, the least recently used ones are
+    flushed and dropped until they fit again. The active deck always stays.
+    """
+
+    settings: dict[str, dict[str, Any]] = {}
+    resident: OrderedDict[str, DB] = OrderedDict()  # least recently used first
+    active: DB | None = None
+    default = ''
+    budget = 512.0
+
+    @staticmethod
+    def configure(config: dict[str, Any]) -> None:
+        Decks.close()
+        Decks.settings = Config.decks(config)
+        Decks.default = config.get('deck', next(iter(Decks.settings), ''))
+        Decks.budget = float(config.get('memory-budget', Decks.budget))
+        Decks.active = None
+
+    @staticmethod
+    def get(name: str) -> DB:
+        db = Decks.resident.get(name)
+        if db is None:
+            db = Decks.resident[name] = DB(name, Decks.settings[name])
+        Decks.resident.move_to_end(name)
+        return db
+
+    @staticmethod
+    def use(name: str) -> DB:
+        """Make a deck the active one, loading it in the background unless it is resident already."""
+        Decks.active = Decks.get(name)
+        if Decks.active.loader is None and not Decks.active.ready.is_set():
+            Decks.active.load_async()
+        Decks.evict()
+        return Decks.active
+
+    @staticmethod
+    def open(name: str | None = None, index: bool = True) -> DB | None:
+        """Load a deck right away and make it the active one, None if there is no such deck or deck file."""
+        name = name or Decks.default
+        if name not in Decks.settings or not Decks.get(name).load(index):
+            return None
+        Decks.active = Decks.get(name)
+        Decks.active.ready.set()
+        return Decks.active
+
     @staticmethod
-    def save(config: dict[str, str] = None) -> None:
-        if config is None:
-            with open('config.json', 'r', encoding='utf-8') as config_file:
-                config = json.load(config_file)
-        if len(DB.data) >= DB.init_size:
-            with open(config['db-path'] + '.bak', 'w', encoding='utf-8') as db_file_backup:
-                json.dump(DB.data, db_file_backup, cls=RecordEncoder, ensure_ascii=False, indent=4)
-        with open(config['db-path'], 'w', encoding='utf-8') as db_file:
-            json.dump(DB.data, db_file, cls=RecordEncoder, ensure_ascii=False, indent=4)
+    def evict() -> None:
+        total = sum(db.footprint() for db in Decks.resident.values())
+        for name, db in list(Decks.resident.items()):
+            if total <= Decks.budget * (1 << 20):
+                break
+            if db is Decks.active or not db.ready.is_set():
+                continue
+            total -= db.footprint()
+            db.close()
+            del Decks.resident[name]
+
+    @staticmethod
+    def close() -> None:
+        for db in Decks.resident.values():
+            db.close()
+        Decks.resident.clear()
 
 
 class Term:
@@ -207,21 +1753,39 @@ class Term:
     hide_cursor_code = '\033[?25l'
     show_cursor_code = '\033[?25h'
 
-    width, height = (80, 25) if DEBUG else os.get_terminal_size()
+    width, height = (80, 25) if DEBUG else shutil.get_terminal_size((80, 25))
     in_width, in_height = width - 2, height - 2
     buffer = [' ' * width] * height
+    frame: list[str] = []
+    frame_bytes = 0
+    bytes_written = 0
+    first_frame: float | None = None
     cursor: tuple[int, int] | None = None
+    headless = False
+    frames: deque[str] = deque(maxlen=100)
+    decoder = KeyDecoder()
+    keys: deque[Key] = deque()
 
     @staticmethod
     def clear():
-        os.system('cls' if os.name == 'nt' else 'clear')
+        if not Term.headless:
+            os.system('cls' if os.name == 'nt' else 'clear')
+        Term.frame = []
 
     @staticmethod
     def refresh() -> None:
         Term.clear()
-        Term.width, Term.height = os.get_terminal_size()
+        if not Term.headless:
+            Term.width, Term.height = shutil.get_terminal_size((80, 25))
         Term.in_width, Term.in_height = Term.width - 2, Term.height - 2
 
+    @staticmethod
+    def resize(width: int, height: int) -> None:
+        Term.width, Term.height = width, height
+        Term.in_width, Term.in_height = Term.width - 2, Term.height - 2
+        Term.frame = []
+        Term.reset()
+
     @staticmethod
     def reset() -> None:
         title = 'Trans Dictionary'
@@ -229,16 +1793,49 @@ class Term:
         Term.buffer[0] = '╭' + f'┐{title}┌'.center(Term.in_width, '─') + '╮'
         Term.buffer[Term.height - 1] = '╰' + '─' * Term.in_width + '╯'
 
+    @staticmethod
+    def _diff() -> list[str]:
+        """Cursor-addressed writes for the spans that differ from the last frame."""
+        out = []
+        for y, (old, new) in enumerate(zip(Term.frame, Term.buffer)):
+            if old == new:
+                continue
+            x = 0
+            while x < len(old) and x < len(new) and old[x] == new[x]:
+                x += 1
+            escape = new.rfind('\033', 0, x)
+            if escape != -1 and 'm' not in new[escape:x]:
+                x = escape
+            old_end, new_end = len(old), len(new)
+            if '\033' not in old[x:] and '\033' not in new[x:]:
+                while old_end > x and new_end > x and old[old_end - 1] == new[new_end - 1]:
+                    old_end -= 1
+                    new_end -= 1
+                if StrTool.visible_len(old[x:old_end]) != StrTool.visible_len(new[x:new_end]):
+                    new_end = len(new)
+            # The span is written out of context, so the SGR state of the row up to it is replayed first
+            state = Style.RESET + ''.join(m.group() for m in re.finditer('\033\\[[0-9;]*m', new[:x]))
+            out.append(f'\033[{y + 1};{StrTool.visible_len(new[:x]) + 1}H' + state + new[x:new_end])
+        return out
+
     @staticmethod
     def draw() -> None:
-        print(
-            '' if DEBUG else Term.reset_pos_code,
-            '\n'.join(Term.buffer),
-            Term.hide_cursor_code if Term.cursor is None else (Term.show_cursor_code + f'\033[{Term.cursor[0]};{Term.cursor[1]}H'),
-            sep='',
-            end='',
-            flush=True,
-        )
+        if DEBUG or len(Term.frame) != len(Term.buffer) or len(Term.frame[0]) != len(Term.buffer[0]):
+            out = ['' if DEBUG else Term.reset_pos_code, '\n'.join(Term.buffer)]
+        else:
+            out = Term._diff()
+        out.append(Term.hide_cursor_code if Term.cursor is None else (Term.show_cursor_code + f'\033[{Term.cursor[0]};{Term.cursor[1]}H'))
+        out = ''.join(out)
+        if Term.headless:
+            Term.frames.append('\n'.join(Term.buffer))
+        else:
+            sys.stdout.write(out)
+            sys.stdout.flush()
+        if Term.first_frame is None:
+            Term.first_frame = time.monotonic() - STARTED
+        Term.frame_bytes = len(out.encode())
+        Term.bytes_written += Term.frame_bytes
+        Term.frame = list(Term.buffer)
         Term.cursor = None
 
     @staticmethod
@@ -292,9 +1889,9 @@ class Term:
                 line = ' ' * x + line + ' ' * (Term.in_width - x - line_width)
             else:
                 line += ' ' * (Term.in_width - line_width)
-            v_len = StrTool.visible_len(line)
-            if v_len > Term.in_width:
+            if line_width > Term.in_width:
                 line = line[: StrTool.visible_index(line, Term.in_width)] + '…'
+                line += ' ' * (Term.in_width - StrTool.visible_len(line))
             Term.buffer[y + i] = '│' + line + '│'
 
     @staticmethod
@@ -337,10 +1934,15 @@ class Term:
                 return Key('x00-' + str(b)[2:-1])
             return Key(str(b)[2:-1])
         else:
-            old_settings = termios.tcgetattr(sys.stdin)
-            tty.setcbreak(sys.stdin.fileno())
-            b = os.read(sys.stdin.fileno(), 3).decode()
-            return Key(str(b))
+            fd = sys.stdin.fileno()
+            cooked = termios.tcgetattr(fd)
+            try:
+                tty.setcbreak(fd)
+                while not Term.keys:
+                    Term.keys.extend(Term.decoder.feed(os.read(fd, 1024)))
+            finally:
+                termios.tcsetattr(fd, termios.TCSADRAIN, cooked)
+            return Term.keys.popleft()
 
 
 class Style:
@@ -417,6 +2019,7 @@ class State:
         EXPLORE = 'explore'
         QUIT = 'quit'
         EDIT = 'edit'
+        DECKS = 'decks'
 
     class Direction:
         STRAIGHT = 0
@@ -450,6 +2053,250 @@ MENU[6] = MENU[6].replace('[R]', Style.GREEN + '[R]' + Style.DEFAULT)
 MENU[8] = MENU[8].replace('[Q]', Style.RED + '[Q]' + Style.DEFAULT)
 
 
+class Perf:
+    """Opt-in timings of the main loop, enabled by TD_PERF=1 or "perf": true in the config.
+
+    Keeps rolling percentiles per phase, draws them as a HUD in the bottom border,
+    and dumps everything as a Chrome trace (chrome://tracing, Perfetto) on quit.
+    """
+
+    enabled = os.environ.get('TD_PERF', '').lower() in ('1', 'true', 'yes', 'on')
+    trace_path = os.environ.get('TD_PERF_TRACE', 'trace.json')
+    window = 200
+    max_events = 200_000
+    origin = time.perf_counter()
+    samples: dict[str, deque] = {}
+    events: list[dict] = []
+
+    @staticmethod
+    @contextlib.contextmanager
+    def phase(name: str):
+        if not Perf.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            Perf.record(name, started, time.perf_counter() - started)
+
+    @staticmethod
+    def record(name: str, started: float, duration: float) -> None:
+        Perf.samples.setdefault(name, deque(maxlen=Perf.window)).append(duration)
+        if len(Perf.events) < Perf.max_events:
+            Perf.events.append(
+                {
+                    'name': name,
+                    'ph': 'X',
+                    'ts': (started - Perf.origin) * 1e6,
+                    'dur': duration * 1e6,
+                    'pid': os.getpid(),
+                    'tid': threading.get_ident(),
+                }
+            )
+
+    @staticmethod
+    def counter(name: str, value: float) -> None:
+        if Perf.enabled and len(Perf.events) < Perf.max_events:
+            Perf.events.append({'name': name, 'ph': 'C', 'ts': (time.perf_counter() - Perf.origin) * 1e6, 'pid': os.getpid(), 'args': {name: value}})
+
+    @staticmethod
+    def percentile(name: str, q: float) -> float:
+        samples = sorted(Perf.samples.get(name, ()))
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    @staticmethod
+    def hud(state: str) -> None:
+        if not Perf.enabled:
+            return
+        parts = [state]
+        for label, name in (('print', state + '.print'), ('handle', state + '.handle'), ('draw', 'draw'), ('save', 'save')):
+            if name in Perf.samples:
+                parts.append(f'{label} {Perf.percentile(name, 0.5) * 1000:.1f}/{Perf.percentile(name, 0.95) * 1000:.1f}')
+        line = f' {" · ".join(parts)} ms p50/p95 · {Term.frame_bytes} B '.center(Term.in_width, Border.HORIZ)[: Term.in_width]
+        Term.buffer[Term.height - 1] = Border.ARC_TR + line + Border.ARC_TL
+
+    @staticmethod
+    def dump() -> None:
+        if not Perf.enabled:
+            return
+        with open(Perf.trace_path, 'w', encoding='utf-8') as trace_file:
+            json.dump({'traceEvents': Perf.events, 'displayTimeUnit': 'ms'}, trace_file)
+
+
+class Runtime:
+    """asyncio main loop: keys come in through add_reader, SIGWINCH resizes, background work can post redraws.
+
+    On Windows, where the loop can't watch the console, keys come from a reader thread and the size is polled.
+    """
+
+    loop: asyncio.AbstractEventLoop | None = None
+    events: asyncio.Queue | None = None
+    poll_interval = 0.5
+
+    @staticmethod
+    def post_redraw() -> None:
+        """Render a new frame without waiting for a key. Safe to call from any thread."""
+        loop = Runtime.loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(Runtime.events.put_nowait, None)
+
+    @staticmethod
+    def quit() -> None:
+        """Leave the run as if the user quit, so the decks are flushed on the way out."""
+        State.state = State.Enum.QUIT
+        Runtime.events.put_nowait(None)
+
+    @staticmethod
+    def resize() -> None:
+        width, height = shutil.get_terminal_size((80, 25))
+        if (width, height) != (Term.width, Term.height):
+            sys.stdout.write('\033[2J')
+            Term.resize(width, height)
+            Runtime.events.put_nowait(None)
+
+    @staticmethod
+    def _read_keys(loop: asyncio.AbstractEventLoop, events: asyncio.Queue, stop: threading.Event) -> None:
+        # Polled rather than blocking in getch, so the thread ends with its run instead of stealing the next key
+        while not stop.is_set():
+            if msvcrt.kbhit():
+                loop.call_soon_threadsafe(events.put_nowait, Term.getch())
+            else:
+                stop.wait(0.01)
+
+    @staticmethod
+    async def _poll_size() -> None:
+        while True:
+            await asyncio.sleep(Runtime.poll_interval)
+            Runtime.resize()
+
+    @staticmethod
+    async def run(logic: dict[str, 'LogicBlock'], record: TextIO | None = None) -> None:
+        """Render and handle keys until the app quits, then put the terminal back into cooked mode."""
+        loop = Runtime.loop = asyncio.get_running_loop()
+        Runtime.events = asyncio.Queue()
+        fd = sys.stdin.fileno()
+        if os.name == 'nt':
+            stop = threading.Event()
+            reader = threading.Thread(target=Runtime._read_keys, args=(loop, Runtime.events, stop), daemon=True)
+            reader.start()
+            poller = loop.create_task(Runtime._poll_size())
+        else:
+            cooked = termios.tcgetattr(fd)
+            tty.setcbreak(fd)
+            loop.add_reader(fd, lambda: [Runtime.events.put_nowait(key) for key in Term.decoder.feed(os.read(fd, 65536))])
+            loop.add_signal_handler(signal.SIGWINCH, Runtime.resize)
+            for signum in (signal.SIGTERM, signal.SIGHUP):
+                loop.add_signal_handler(signum, Runtime.quit)
+        try:
+            render(logic)
+            while State.state != State.Enum.QUIT:
+                events = [await Runtime.events.get()]
+                while not Runtime.events.empty():
+                    events.append(Runtime.events.get_nowait())
+                keys = [key for key in events if key is not None]
+                if not keys:
+                    Term.reset()
+                printed = State.state
+                for key in keys:
+                    if State.state != printed:
+                        render(logic, draw=False)
+                        printed = State.state
+                    if record is not None:
+                        record.write(key.script())
+                        record.flush()
+                    handle(logic, key)
+                    if State.state == State.Enum.QUIT:
+                        break
+                if State.state != State.Enum.QUIT:
+                    render(logic)
+        finally:
+            Runtime.loop = None
+            if os.name == 'nt':
+                poller.cancel()
+                stop.set()
+                reader.join()
+            else:
+                for signum in (signal.SIGWINCH, signal.SIGTERM, signal.SIGHUP):
+                    loop.remove_signal_handler(signum)
+                loop.remove_reader(fd)
+                termios.tcsetattr(fd, termios.TCSADRAIN, cooked)
+
+
+class SearchTask:
+    """Explore mode search, run over shards of the candidate phrases so that typing never waits for it.
+
+    A search runs inline until it exceeds `budget` seconds, then continues as a task on the Runtime loop.
+    After every shard the running top results are published to the explore state with a redraw.
+    Starting a newer search cancels the one still in flight.
+    """
+
+    shard_size = 5_000
+    budget = 0.015
+    task: asyncio.Task | None = None
+
+    @staticmethod
+    def cancel() -> None:
+        if SearchTask.task is not None:
+            SearchTask.task.cancel()
+            SearchTask.task = None
+
+    @staticmethod
+    def start(parameter: dict) -> None:
+        SearchTask.cancel()
+        steps = SearchTask._steps(parameter, Term.in_height - 5)
+        deadline = time.perf_counter() + SearchTask.budget
+        for _ in steps:
+            if Runtime.loop is not None and time.perf_counter() > deadline:
+                parameter['updating'] = True
+                SearchTask.task = Runtime.loop.create_task(SearchTask._finish(steps))
+                return
+
+    @staticmethod
+    async def _finish(steps: Iterator[None]) -> None:
+        for _ in steps:
+            Runtime.post_redraw()
+            await asyncio.sleep(0)
+        Runtime.post_redraw()
+        SearchTask.task = None
+
+    @staticmethod
+    def _steps(parameter: dict, room: int) -> Iterator[None]:
+        db = Decks.active
+        promt = parameter['promt']
+        keys = []
+        if promt:
+            yield from db.index.building()
+            keys = yield from parameter['search'].searching(promt)
+        yield
+        relevance = Ranker.relevance(promt)
+        best: list[str] = []
+        for start in range(0, len(keys), SearchTask.shard_size):
+            shard = (key for key in keys[start : start + SearchTask.shard_size] if key in db.data)
+            best = heapq.nlargest(room, itertools.chain(best, shard), key=relevance)
+            SearchTask._publish(parameter, [(key, db.data.copy(key)) for key in best], [])
+            yield
+        fuzzy = []
+        if len(best) < room - 1 and len(promt) >= 3:
+            exact = set(best)
+            fuzzy_keys = (k for k in (yield from db.fuzzy.searching(promt)) if k not in exact)
+            fuzzy = [(k, db.data.copy(k)) for k in itertools.islice(fuzzy_keys, room - 1 - len(best))]
+        SearchTask._publish(parameter, [(key, db.data.copy(key)) for key in best], fuzzy)
+        parameter['updating'] = False
+
+    @staticmethod
+    def _publish(parameter: dict, filtered: list[tuple[str, Record]], fuzzy: list[tuple[str, Record]]) -> None:
+        # Rows are copies: they outlive the frame, and a view would show whatever phrase reuses a deleted slot
+        parameter['filtered'] = filtered
+        parameter['fuzzy'] = fuzzy
+        if not parameter['promt']:
+            parameter['selection'] = -1
+        if parameter['selection'] >= len(filtered):
+            parameter['selection'] = len(filtered) - 1
+
+
 class LogicBlock:
     printer: callable
     handler: callable
@@ -463,19 +2310,51 @@ def menu_print():
     Term.insert(MENU, align_center=True)
     if State.parameter is None:
         Term.insert(f'{Style.GREEN}[ESC]{Style.DEFAULT} Back to menu from anywhere', -2, True)
+    elif State.parameter == '':
+        db = Decks.active
+        if db.ready.is_set():
+            timing = f'{db.load_time * 1000:.0f} ms to load'
+            if Term.first_frame is not None:
+                timing = f'{Term.first_frame * 1000:.0f} ms to first frame, ' + timing
+            Term.insert(
+                f'Hi, here are {Style.YELLOW}{len(db.data)}{Style.DEFAULT} words saved!{Style.BRIGHT_BLACK} ({timing}){Style.DEFAULT}',
+                -2,
+                True,
+            )
+        else:
+            Term.insert(Style.BRIGHT_BLACK + db.progress + Style.DEFAULT, -2, True)
+        if db.autosave.error is not None:
+            Term.insert(f'{Style.RED}Autosave failed, will retry: {db.autosave.error}{Style.DEFAULT}', -3, True)
     elif State.parameter:
         Term.insert(State.parameter, -2, True, True)
+    if len(Decks.settings) > 1:
+        Term.insert(f'{Style.BRIGHT_BLACK}Deck{Style.DEFAULT} {Decks.active.name}  {Style.GREEN}[D]{Style.DEFAULT} to switch', 1, True)
+
+
+def wait_for_deck():
+    db = Decks.active
+    if not db.ready.is_set():
+        Term.reset()
+        Term.insert(Style.BRIGHT_BLACK + db.progress + Style.DEFAULT)
+        Term.draw()
+    db.wait()
+    Decks.evict()
 
 
 def menu_handle(k: Key):
     state_change = True
     if k == 'a':
+        wait_for_deck()
         State.state = State.Enum.ADD
     elif k == 'e':
+        wait_for_deck()
         State.state = State.Enum.EXPLORE
     elif k == Key.Special.ENTER:
+        wait_for_deck()
         State.first_time = True
         State.state = State.Enum.SCROLL
+    elif k == 'd' and len(Decks.settings) > 1:
+        State.state = State.Enum.DECKS
     elif k == 'r':
         Term.refresh()
         state_change = False
@@ -533,7 +2412,7 @@ def add_print():
         token = State.parameter.lower()
         if ' - ' in token:
             token = token[: token.index(' - ')]
-        filtered = sorted(filter(lambda item: token in item[0].lower(), DB.data.items()), reverse=True)[:9]
+        filtered = Ranker.top(token, Decks.active.index.search(token, translations=False), 9, translations=False)
         for i in range(len(filtered)):
             Term.insert(f'{Style.BRIGHT_BLACK}  >{Style.DEFAULT} ' + filtered[i][0] + ' - ' + filtered[i][1].translation, -5 - i)
     Term.set_cursor(-2, len(State.parameter) + 5)
@@ -546,9 +2425,7 @@ def add_handle(k: Key):
     elif k == Key.Special.ENTER:
         if ' - ' in State.parameter:
             key, val = State.parameter.split(' - ', 1)
-            val = Record(val)
-            DB.data[key] = val
-            DB.save()
+            Decks.active.set(key, Record(val))
             phrase = Style.BRIGHT_BLUE + State.parameter[: State.parameter.index(' - ')] + Style.DEFAULT
             State.parameter = f'Phrase {phrase} is successfully added'
         else:
@@ -587,16 +2464,28 @@ def add_handle(k: Key):
 def explore_print():
     first_time = State.parameter is None
     if first_time:
-        State.parameter = {'promt': '', 'filtered': [], 'selection': -1}
+        State.parameter = {
+            'promt': '',
+            'filtered': [],
+            'fuzzy': [],
+            'selection': -1,
+            'search': SearchCursor(),
+            'stale': False,
+            'updating': False,
+        }
+    if State.parameter['stale']:
+        explore_filter()
 
     Term.insert(Style.BLINK_ON + '  ⮞ ' + Style.BLINK_OFF + State.parameter['promt'], y=-3)
     if State.scroll_mode == State.Direction.STRAIGHT:
         tip = Style.BRIGHT_BLUE + 'Search'
     else:
         tip = Style.GREEN + 'Поиск'
-    Term.insert('    ' + tip + Style.BRIGHT_BLACK + '  [Tab] to swap' + Style.DEFAULT, y=-2)
+    updating = '  updating…' if State.parameter['updating'] else ''
+    Term.insert('    ' + tip + Style.BRIGHT_BLACK + '  [Tab] to swap' + Style.YELLOW + updating + Style.DEFAULT, y=-2)
 
-    for i in range(len(State.parameter['filtered'])):
+    rows = Term.in_height - 5
+    for i in range(min(len(State.parameter['filtered']), rows)):
         bullet_color = Style.GREEN if i == State.parameter['selection'] else Style.BRIGHT_BLACK
         line = (
             f'  {bullet_color}•{Style.DEFAULT} {State.parameter["filtered"][i][0]}'
@@ -609,6 +2498,12 @@ def explore_print():
             line = Style.from_hex('#333', True) + line + ' ' + Style.DEFAULT_BG
         Term.insert(line, -5 - i)
 
+    if State.parameter['fuzzy'] and len(State.parameter['filtered']) < rows - 1:
+        y = -5 - len(State.parameter['filtered'])
+        Term.insert(f'  {Style.BRIGHT_BLACK}Maybe you meant{Style.DEFAULT}', y)
+        for i, (phrase, record) in enumerate(State.parameter['fuzzy'][: rows - 1 - len(State.parameter['filtered'])]):
+            Term.insert(f'  {Style.BRIGHT_BLACK}≈ {phrase} - {record.translation} [{record.rate}]{Style.DEFAULT}', y - 1 - i)
+
     if first_time:
         Term.insert(
             f'    {Style.RED}[D]{Style.DEFAULT}elete, {Style.GREEN}[E]{Style.DEFAULT}dit, {Style.GREEN}[R]{Style.DEFAULT}eset selection',
@@ -618,9 +2513,20 @@ def explore_print():
         Term.set_cursor(-2, len(State.parameter['promt']) + 5)
 
 
+def explore_filter():
+    """Rank the exact hits for the prompt and fill the rows left over with fuzzy ones, see SearchTask."""
+    State.parameter['stale'] = False
+    SearchTask.start(State.parameter)
+
+
 def explore_handle(k: Key):
+    # Typing only marks the results stale, so a burst of queued keys is filtered once before its frame
+    editing = State.parameter['selection'] == -1 and (k.special == Key.Special.PRINTABLE or k == Key.Special.BACKSPACE)
+    if State.parameter['stale'] and not editing:
+        explore_filter()
     update_filtered = False
     if k == Key.Special.ESCAPE:
+        SearchTask.cancel()
         State.state = State.Enum.MENU
         State.parameter = None
     elif k == Key.Special.ARROW_UP:
@@ -634,6 +2540,7 @@ def explore_handle(k: Key):
             State.explore_mode = 1 - State.explore_mode
             State.parameter['promt'] = ''
             State.parameter['selection'] = -1
+            State.parameter['search'].reset()
             update_filtered = True
         elif k == Key.Special.BACKSPACE:
             if State.parameter['promt']:
@@ -646,28 +2553,21 @@ def explore_handle(k: Key):
                 State.parameter['promt'] += str(k)
             update_filtered = True
     else:
+        # A search still in flight would republish the rows under the selection, so it is stopped first
         if k == 'd':
-            del DB.data[State.parameter['filtered'][State.parameter['selection']][0]]
+            SearchTask.cancel()
+            deleted, _ = State.parameter['filtered'].pop(State.parameter['selection'])
+            Decks.active.delete(deleted)
+            State.parameter['selection'] = min(State.parameter['selection'], len(State.parameter['filtered']) - 1)
             update_filtered = True
-            DB.save()
         elif k == 'e':
+            SearchTask.cancel()
+            State.parameter['edited'] = State.parameter['filtered'][State.parameter['selection']][0]
             State.state = State.Enum.EDIT
         elif k == 'r':
             State.parameter['selection'] = -1
     if update_filtered:
-        if State.parameter['promt']:
-            State.parameter['filtered'] = sorted(
-                filter(
-                    lambda s: State.parameter['promt'].lower() in s[0].lower() + s[1].translation.lower(),
-                    DB.data.items(),
-                ),
-                reverse=True,
-            )[: Term.in_height - 5]
-        else:
-            State.parameter['filtered'] = []
-            State.parameter['selection'] = -1
-        if State.parameter['selection'] >= len(State.parameter['filtered']):
-            State.parameter['selection'] = len(State.parameter['filtered']) - 1
+        State.parameter['stale'] = True
 
 
 def edit_print():
@@ -684,7 +2584,7 @@ def edit_print():
         tip = Style.GREEN + 'Поиск'
     Term.insert('    ' + Style.BRIGHT_BLACK + tip + Style.DEFAULT, y=-2)
 
-    for i in range(len(State.parameter['filtered'])):
+    for i in range(min(len(State.parameter['filtered']), Term.in_height - 5)):
         if State.parameter['selection'] == i:
             line = '  • ' + StrTool.format(State.parameter['mod'], colorize=True)
         else:
@@ -703,26 +2603,18 @@ def edit_handle(k: Key):
     if k == Key.Special.ESCAPE:
         del State.parameter['mod']
         del State.parameter['cursor']
+        del State.parameter['edited']
+        State.parameter['stale'] = True  # finishes the search stopped by the edit
         State.state = State.Enum.EXPLORE
     elif k == Key.Special.ENTER:
-        old_val = DB.data.pop(State.parameter['filtered'][State.parameter['selection']][0])
         kvp = State.parameter['mod'].split(' - ', 1)
-        DB.data[kvp[0]] = Record(kvp[1], old_val.rate)
-        DB.save()
-
-        if State.parameter['promt']:
-            State.parameter['filtered'] = sorted(
-                filter(
-                    lambda s: State.parameter['promt'].lower() in s[0].lower() + s[1].translation.lower(),
-                    DB.data.items(),
-                ),
-                reverse=True,
-            )[: Term.in_height - 5]
-        else:
-            State.parameter['filtered'] = []
-            State.parameter['selection'] = -1
-        if State.parameter['selection'] >= len(State.parameter['filtered']):
-            State.parameter['selection'] = len(State.parameter['filtered']) - 1
+        # Nothing is deleted until the edit holds a phrase and a translation again
+        if len(kvp) < 2 or not kvp[0].strip() or not kvp[1].strip():
+            return
+        old_val = Decks.active.delete(State.parameter.pop('edited'))
+        Decks.active.set(kvp[0], Record(kvp[1], old_val.rate, old_val.schedule))
+
+        explore_filter()
 
         del State.parameter['mod']
         del State.parameter['cursor']
@@ -787,16 +2679,11 @@ def scroll_print():
 
 
 def get_new_phrase():
-    items = DB.data.items()
-    rate_sum = 0
-    for item in items:
-        rate_sum += item[1].rate
-    rnd = random.random() * rate_sum
-    for item in items:
-        if rnd < item[1].rate:
-            break
-        rnd -= item[1].rate
-    State.parameter = {'phrase': item[0], 'record': item[1], 'reveal': False}
+    db = Decks.active
+    phrase = db.scheduler.next(time.time()) if db.scheduler is not None else None
+    if phrase is None:
+        phrase = db.sampler.sample()
+    State.parameter = {'phrase': phrase, 'record': db.data.get(phrase), 'reveal': False}
 
 
 def scroll_handle(k: Key):
@@ -808,23 +2695,109 @@ def scroll_handle(k: Key):
             State.parameter['reveal'] = True
         else:
             if State.parameter['record']:
-                State.parameter['record'].rate *= 0.75
-                DB.save()
+                Decks.active.review(State.parameter['phrase'], True)
             get_new_phrase()
     elif k == "'":
         if State.parameter['reveal'] and State.parameter['record']:
-            State.parameter['record'].rate *= 1.25
-            DB.save()
+            Decks.active.review(State.parameter['phrase'], False)
             State.parameter['reveal'] = True
             get_new_phrase()
 
 
-def main():
+def decks_print():
+    if State.parameter is None:
+        names = list(Decks.settings)
+        State.parameter = {'names': names, 'selection': names.index(Decks.active.name), 'message': ''}
+
+    names = State.parameter['names']
+    rows = Term.in_height - 5
+    top = max(0, State.parameter['selection'] - rows + 1)
+    for i, name in enumerate(names[top : top + rows], top):
+        db = Decks.resident.get(name)
+        if db is None:
+            status = 'not loaded'
+        elif not db.ready.is_set():
+            status = 'loading…'
+        else:
+            status = f'{len(db.data)} words'
+        bullet_color = Style.GREEN if i == State.parameter['selection'] else Style.BRIGHT_BLACK
+        current = f' {Style.YELLOW}(current)' if db is not None and db is Decks.active else ''
+        line = f'  {bullet_color}•{Style.DEFAULT} {name} {Style.BRIGHT_BLACK}[{status}]{current}{Style.DEFAULT}'
+        if i == State.parameter['selection']:
+            line = Style.from_hex('#333', True) + line + ' ' + Style.DEFAULT_BG
+        Term.insert(line, 1 + i - top)
+    Term.insert(State.parameter['message'], -3)
+    Term.insert(f'    {Style.GREEN}[Enter]{Style.DEFAULT} Switch to the deck', -2)
+
+
+def decks_handle(k: Key):
+    if k == Key.Special.ESCAPE:
+        State.state = State.Enum.MENU
+        State.parameter = None
+    elif k == Key.Special.ARROW_UP:
+        State.parameter['selection'] = max(0, State.parameter['selection'] - 1)
+    elif k == Key.Special.ARROW_DOWN:
+        State.parameter['selection'] = min(len(State.parameter['names']) - 1, State.parameter['selection'] + 1)
+    elif k == Key.Special.ENTER:
+        name = State.parameter['names'][State.parameter['selection']]
+        if not DB.exists(Decks.settings[name]):
+            State.parameter['message'] = Style.RED + f'  {Decks.settings[name]["db-path"]} not found' + Style.DEFAULT
+            return
+        Decks.use(name)
+        config = dict(Config.load())
+        # A replay without --save leaves config.json alone, the same as the decks
+        if Autosave.enabled and name != config.get('deck', next(iter(Decks.settings))):
+            config['deck'] = name
+            Config.save(config)
+        State.state = State.Enum.MENU
+        State.parameter = ''
+
+
+def logic_blocks() -> dict[str, LogicBlock]:
+    return {
+        State.Enum.MENU: LogicBlock(menu_print, menu_handle),
+        State.Enum.ADD: LogicBlock(add_print, add_handle),
+        State.Enum.EXPLORE: LogicBlock(explore_print, explore_handle),
+        State.Enum.EDIT: LogicBlock(edit_print, edit_handle),
+        State.Enum.SCROLL: LogicBlock(scroll_print, scroll_handle),
+        State.Enum.DECKS: LogicBlock(decks_print, decks_handle),
+    }
+
+
+def render(logic: dict[str, LogicBlock], draw: bool = True) -> None:
+    """Print the current state into the frame and draw it.
+
+    With draw=False the frame is only built, for the state setup the printers do on entering a state.
+    """
+    state = State.state
+    with Perf.phase(state + '.print'):
+        logic[state].printer()
+    if not draw:
+        Term.cursor = None
+        return
+    Perf.hud(state)
+    with Perf.phase('draw'):
+        Term.draw()
+    Perf.counter('frame bytes', Term.frame_bytes)
+
+
+def handle(logic: dict[str, LogicBlock], k: Key) -> None:
+    state = State.state
+    State.first_time = state == State.Enum.MENU
+    with Perf.phase(state + '.handle'):
+        logic[state].handler(k)
+    with Perf.phase('reset'):
+        Term.reset()
+
+
+def main(deck: str | None = None):
     # Setup config
     try:
-        with open('config.json', 'r', encoding='utf-8') as config_file:
-            config = json.load(config_file)
-    except FileNotFoundError:
+        config = dict(Config.load())
+    except ValueError as e:
+        print(Style.RED + str(e) + Style.DEFAULT)
+        return
+    if not config:
         Term.clear()
         print(Style.BOLD + Style.YELLOW + 'Hello!\n' + Style.DEFAULT)
         print(
@@ -832,65 +2805,331 @@ def main():
             Style.DEFAULT + 'Creating a new one...',
             sep='\n',
         )
-        config = {}
-
-    ok = False
 
     # Setup database
     create_new_db = False
-    while not ok:
-        if 'db-path' not in config:
+    ask = not Config.decks(config)
+    missing = None  # the "decks" entry to ask a new path for, None for the "db-path" deck
+    while True:
+        if ask:
             create_new_db = input('Do you want to create a new database? [y/N] ') == 'y'
-            config['db-path'] = input('Database filepath: ')
+            (config if missing is None else config['decks'][missing])['db-path'] = input('Database filepath: ')
+            try:
+                Config.validate(config)
+            except ValueError as e:
+                print(Style.RED + str(e) + Style.DEFAULT)
+                continue
+        decks = Config.decks(config)
+        deck = deck or config.get('deck', next(iter(decks)))
+        if deck not in decks:
+            print(Style.RED + f'No deck {deck} in {Config.path}.' + Style.DEFAULT)
+            return
         if create_new_db:
-            with open(config['db-path'], 'w', encoding='utf-8') as db_file:
+            with open(decks[deck]['db-path'], 'w', encoding='utf-8') as db_file:
                 json.dump({}, db_file, cls=RecordEncoder, ensure_ascii=False, indent=4)
-        ok = DB.load(config)
-        if not ok:
-            print(Style.RED + 'Database not found.' + Style.DEFAULT)
+        if DB.exists(decks[deck]):
+            break
+        print(Style.RED + 'Database not found.' + Style.DEFAULT)
+        ask = True
+        missing = deck if deck in config.get('decks', {}) else None
+        if missing is None:
+            # A new path renames the "db-path" deck after its file
             del config['db-path']
+            if config.get('deck') == deck:
+                del config['deck']
+            deck = None
 
     # Save config
-    with open('config.json', 'w', encoding='utf-8') as config_file:
-        json.dump(config, config_file, ensure_ascii=False, indent=4)
+    Config.save(config)
+    Perf.enabled = Perf.enabled or bool(config.get('perf'))
+    Perf.trace_path = config.get('perf-trace', Perf.trace_path)
+
+    Decks.configure(config)
 
     # Load app logic
     if not DEBUG:
         Term.clear()
-    logic = {
-        State.Enum.MENU: LogicBlock(menu_print, menu_handle),
-        State.Enum.ADD: LogicBlock(add_print, add_handle),
-        State.Enum.EXPLORE: LogicBlock(explore_print, explore_handle),
-        State.Enum.EDIT: LogicBlock(edit_print, edit_handle),
-        State.Enum.SCROLL: LogicBlock(scroll_print, scroll_handle),
-    }
+    logic = logic_blocks()
 
     # Run app
-    DB.load()
+    Decks.use(deck)
     State.state = State.Enum.MENU
     State.next_call = lambda: menu_print()
     Term.reset()
-    State.parameter = f'Hi, here are {Style.YELLOW}{len(DB.data)}{Style.DEFAULT} words saved!'
-    while State.state != State.Enum.QUIT:
-        logic[State.state].printer()
-        Term.draw()
-        c = Term.getch()
-        State.first_time = State.state == State.Enum.MENU
-        logic[State.state].handler(c)
-        Term.reset()
-
+    State.parameter = ''
+    record = open(os.environ['TD_RECORD'], 'a', encoding='utf-8') if os.environ.get('TD_RECORD') else None
+    try:
+        asyncio.run(Runtime.run(logic, record))
+    finally:
+        if record is not None:
+            record.close()
+        # Also on Ctrl-C, where the queued autosave changes would die with their daemon threads
+        Decks.close()
+
+    Perf.dump()
     print(Style.RESET, end='')
     if not DEBUG:
         Term.clear()
 
 
+def export(path: str, deck: str | None = None) -> None:
+    """Write a deck of the configured backend out as a plain JSON file."""
+    Decks.configure(Config.load())
+    db = Decks.open(deck, index=False)
+    if db is None:
+        print(Style.RED + 'Database not found.' + Style.DEFAULT)
+        return
+    with open(path, 'w', encoding='utf-8') as export_file:
+        json.dump(db.data, export_file, cls=RecordEncoder, ensure_ascii=False, indent=4)
+    Decks.close()
+
+
+def restore(name: str | None = None, deck: str | None = None) -> None:
+    """List a deck's snapshots, or replace the deck with one of them, by file name or 'latest'.
+
+    The current deck is snapshotted first, so a restore can itself be undone.
+    """
+    Decks.configure(Config.load())
+    db = Decks.open(deck, index=False)
+    if db is None:
+        print(Style.RED + 'Database not found.' + Style.DEFAULT)
+        return
+    snapshots = db.snapshots.paths()
+    if name is None:
+        for path in snapshots:
+            print(f'{os.path.basename(path)}  {os.path.getsize(path) / 1024:>10.1f} KiB')
+        print(f'{len(snapshots)} snapshot(s) in {db.snapshots.directory}')
+        Decks.close()
+        return
+    matches = snapshots[:1] if name == 'latest' else [path for path in snapshots if os.path.basename(path) == os.path.basename(name)]
+    if not matches:
+        print(Style.RED + f'No snapshot {name} in {db.snapshots.directory}' + Style.DEFAULT)
+        Decks.close()
+        return
+    data = Snapshots.read(matches[0])
+    db.snapshots.take()
+    db.data = data
+    db.save()
+    Decks.close()
+    print(f'Restored {Style.GREEN}{len(data)}{Style.DEFAULT} phrases from {os.path.basename(matches[0])}')
+
+
+def read_rows(path: str, fmt: str, header: bool = False) -> Iterator[list[str]]:
+    """Rows of a word list; with `header` the first line of a CSV/TSV file is skipped."""
+    with open(path, 'r', encoding='utf-8', newline='') as rows_file:
+        if fmt == 'csv':
+            rows = csv.reader(rows_file)
+            if header:
+                next(rows, None)
+            yield from rows
+        elif fmt == 'tsv':
+            if header:
+                rows_file.readline()
+            for line in rows_file:
+                yield line.rstrip('\r\n').split('\t')
+        else:
+            for line in rows_file:
+                if line.strip():
+                    row = json.loads(line)
+                    if isinstance(row, dict):
+                        row = [row.get('phrase', ''), row.get('translation', ''), row.get('rate', '')]
+                    yield [str(cell) for cell in row]
+
+
+def normalize_rows(rows: list[list[str]], mistyped: tuple[int, ...] = ()) -> list[tuple[str, str, float]]:
+    """Phrase, translation and rate of each valid row, formatted the way add mode formats them.
+
+    Columns listed in `mistyped` were typed on the English layout and are mapped through en2ru first.
+    """
+    normalized = []
+    for row in rows:
+        if len(row) < 2:
+            continue
+        cells = [''.join(en2ru.get(c, c) for c in cell) if i in mistyped else cell for i, cell in enumerate(row[:2])]
+        if not cells[0].strip() or not cells[1].strip():
+            continue
+        line = StrTool.format(cells[0] + ' - ' + cells[1])
+        if ' - ' not in line:
+            continue
+        phrase, translation = line.split(' - ', 1)
+        try:
+            rate = float(row[2]) if len(row) > 2 and row[2] else 1.0
+        except ValueError:
+            rate = 1.0
+        if not math.isfinite(rate) or rate < 0:
+            rate = 1.0
+        normalized.append((phrase, translation, rate))
+    return normalized
+
+
+def bounded_map(pool: concurrent.futures.Executor, fn: Callable, items: Iterator, arg: Any, window: int) -> Iterator:
+    """Like pool.map, in order, but reads `items` only as far as `window` calls ahead of the results taken."""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item, arg))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def import_rows(
+    path: str,
+    fmt: str | None = None,
+    policy: str = 'keep-rate',
+    mistyped: tuple[int, ...] = (),
+    workers: int | None = None,
+    header: bool = False,
+    deck: str | None = None,
+) -> None:
+    """Merge a TSV/CSV/JSON Lines word list into the deck and write it out once.
+
+    Existing phrases keep their rate and get the new translation (keep-rate), are replaced (overwrite) or left alone (skip).
+    Phrases are matched case-insensitively, since add mode keeps the capitals inside a phrase but the import can't.
+    """
+    if not os.path.isfile(path):
+        print(Style.RED + f'{path} not found.' + Style.DEFAULT)
+        return
+    if fmt is None:
+        fmt = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}.get(os.path.splitext(path)[1].lower(), 'tsv')
+    if workers is None:
+        workers = (os.cpu_count() or 1) if os.path.getsize(path) > 8 << 20 else 1
+    Decks.configure(Config.load())
+    db = Decks.open(deck, index=False)
+    if db is None:
+        print(Style.RED + 'Database not found.' + Style.DEFAULT)
+        return
+    db.snapshots.take()
+    rows = read_rows(path, fmt, header)
+    chunks = iter(lambda: list(itertools.islice(rows, 10_000)), [])
+    added = updated = skipped = 0
+    existing = {key.lower(): key for key in db.data}
+    with concurrent.futures.ProcessPoolExecutor(workers) if workers > 1 else contextlib.nullcontext() as pool:
+        results = bounded_map(pool, normalize_rows, chunks, mistyped, 2 * workers) if pool else map(normalize_rows, chunks, itertools.repeat(mistyped))
+        for chunk in results:
+            for phrase, translation, rate in chunk:
+                schedule = None
+                phrase = existing.setdefault(phrase.lower(), phrase)
+                if phrase in db.data:
+                    if policy == 'skip':
+                        skipped += 1
+                        continue
+                    if policy == 'keep-rate':
+                        rate, schedule = db.data[phrase].rate, db.data[phrase].schedule
+                    updated += 1
+                else:
+                    added += 1
+                db.data[phrase] = Record(translation, rate, schedule)
+    db.save()
+    Decks.close()
+    print(f'{Style.GREEN}{added}{Style.DEFAULT} added, {Style.YELLOW}{updated}{Style.DEFAULT} updated, {skipped} skipped')
+
+
+def replay(
+    script_path: str,
+    size: str = '80x25',
+    repeat: int = 1,
+    save: bool = False,
+    frames_path: str | None = None,
+    deck: str | None = None,
+) -> None:
+    """Run the real dispatch loop without a terminal, feeding it the keys of a key script (see Key.script).
+
+    Sessions can be recorded for replaying by running the app with TD_RECORD=<file>.
+    """
+    with open(script_path, 'r', encoding='utf-8') as script_file:
+        try:
+            keys = Key.parse_script(script_file.read())
+        except ValueError as e:
+            print(Style.RED + f'{script_path}: {e}' + Style.DEFAULT)
+            return
+    Term.headless = True
+    Term.resize(*map(int, size.split('x')))
+    Autosave.enabled = save
+    Decks.configure(Config.load())
+    db = Decks.open(deck)
+    if db is None:
+        print(Style.RED + 'Database not found.' + Style.DEFAULT)
+        return
+    logic = logic_blocks()
+    handled = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        State.state = State.Enum.MENU
+        State.parameter = ''
+        Term.reset()
+        for key in keys:
+            render(logic)
+            handle(logic, key)
+            handled += 1
+            if State.state == State.Enum.QUIT:
+                break
+        if State.state != State.Enum.QUIT:
+            render(logic)
+    elapsed = time.perf_counter() - started
+    Decks.active.wait()  # the script may have switched decks
+    print(
+        f'{handled} keys in {elapsed:.3f} s ({handled / elapsed:.0f} keys/s), '
+        f'{Term.bytes_written} bytes rendered, {len(Decks.active.data)} phrases in the deck'
+    )
+    if frames_path is not None:
+        with open(frames_path, 'w', encoding='utf-8') as frames_file:
+            frames_file.write('\n\f\n'.join(Term.frames))
+    if save:
+        Decks.close()
+    Perf.dump()
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Trans Dictionary')
+    parser.add_argument('--deck', help='name of the deck to open, by default the last one picked')
+    commands = parser.add_subparsers(dest='command')
+    export_parser = commands.add_parser('export', help='write the deck out as JSON')
+    export_parser.add_argument('path')
+    import_parser = commands.add_parser('import', help='merge a TSV/CSV/JSON Lines word list into the deck')
+    import_parser.add_argument('path')
+    import_parser.add_argument('--format', choices=('tsv', 'csv', 'jsonl'), help='by default guessed from the extension')
+    import_parser.add_argument('--policy', choices=('keep-rate', 'overwrite', 'skip'), default='keep-rate', help='what to do with phrases already in the deck')
+    import_parser.add_argument(
+        '--mistyped',
+        choices=('phrase', 'translation'),
+        action='append',
+        default=[],
+        help='column typed on the English layout instead of the Russian one',
+    )
+    import_parser.add_argument('--workers', type=int, help='normalization processes, by default one per CPU for files over 8 MB')
+    import_parser.add_argument('--header', action='store_true', help='skip the first line of a TSV/CSV file')
+    restore_parser = commands.add_parser('restore', help='list the deck snapshots or bring one of them back')
+    restore_parser.add_argument('snapshot', nargs='?', help="file name of the snapshot or 'latest', lists them when omitted")
+    replay_parser = commands.add_parser('replay', help='run a key script headlessly')
+    replay_parser.add_argument('script')
+    replay_parser.add_argument('--size', default='80x25', help='virtual terminal size, WIDTHxHEIGHT')
+    replay_parser.add_argument('--repeat', type=int, default=1)
+    replay_parser.add_argument('--save', action='store_true', help='persist the changes the script makes')
+    replay_parser.add_argument('--frames', help='write the last captured frames to this file')
+    args = parser.parse_args()
+    if args.command == 'export':
+        export(args.path, args.deck)
+        sys.exit()
+    if args.command == 'import':
+        import_rows(args.path, args.format, args.policy, tuple(('phrase', 'translation').index(c) for c in args.mistyped), args.workers, args.header, args.deck)
+        sys.exit()
+    if args.command == 'restore':
+        restore(args.snapshot, args.deck)
+        sys.exit()
+    if args.command == 'replay':
+        replay(args.script, args.size, args.repeat, args.save, args.frames, args.deck)
+        sys.exit()
     run = True
     while run:
         try:
-            main()
+            main(args.deck)
+            run = False
+        except KeyboardInterrupt:
             run = False
         except Exception as e:
+            Decks.close()
+            Perf.dump()
             Term.clear()
             print(Style.RED + 'Error: \n' + Style.BRIGHT_BLACK)
             traceback.print_exception(e)
@@ -0,0 +1,39 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """An empty working directory for config.json and the decks, with the app's global state put back afterwards."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main.Config, 'data', {})
+    monkeypatch.setattr(main.Config, 'stamp', None)
+    monkeypatch.setattr(main.Autosave, 'enabled', True)
+    monkeypatch.setattr(main.Decks, 'budget', main.Decks.budget)
+    yield tmp_path
+    main.Decks.close()
+    main.Decks.active = None
+
+
+@pytest.fixture
+def make_deck(workdir):
+    """Write a JSON deck from {phrase: translation or (translation, rate)} and return its path."""
+
+    def make(records: dict, name: str = 'deck.json') -> str:
+        raw = {}
+        for phrase, value in records.items():
+            translation, rate = value if isinstance(value, tuple) else (value, 1.0)
+            raw[phrase] = {'translation': translation, 'rate': rate}
+        path = str(workdir / name)
+        with open(path, 'w', encoding='utf-8') as db_file:
+            json.dump(raw, db_file, ensure_ascii=False)
+        return path
+
+    return make
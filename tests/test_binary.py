@@ -0,0 +1,78 @@
+import os
+
+from main import DB, BinaryBackend, Record
+
+
+def load(path: str, **settings) -> DB:
+    db = DB('deck', {'db-path': path, 'db-backend': 'binary', **settings})
+    assert db.load()
+    return db
+
+
+def contents(db: DB) -> dict[str, tuple[str, float]]:
+    return {key: (record.translation, record.rate) for key, record in db.data.items()}
+
+
+def journal(path: str) -> list[str]:
+    journal_path = BinaryBackend(path).path + '.journal'
+    if not os.path.exists(journal_path):
+        return []
+    with open(journal_path, encoding='utf-8') as journal_file:
+        return [line.split('"op": ')[1].split(',')[0].strip('"') for line in journal_file]
+
+
+def test_rates_are_written_in_place(make_deck):
+    path = make_deck({'Cat': 'Кот', 'Dog': 'Собака'})
+    db = load(path)
+    assert db.backend.slots is db.data.slots
+    db.set_rate('Cat', 3.0)
+    db.autosave.flush()
+    assert journal(path) == []
+    db.close()
+    assert db.backend.map is None
+    assert contents(load(path)) == {'Cat': ('Кот', 3.0), 'Dog': ('Собака', 1.0)}
+
+
+def test_replaced_phrases_are_rated_through_the_journal(make_deck):
+    path = make_deck({'Cat': 'Кот', 'Dog': 'Собака'})
+    db = load(path)
+    db.set('Cat', Record('Кошка'))
+    db.set_rate('Cat', 2.0)
+    db.delete('Dog')
+    db.set('Fox', Record('Лиса'))  # takes over the slot of Dog
+    db.set_rate('Fox', 4.0)
+    db.close()
+    assert journal(path) == ['set', 'rate', 'del', 'set', 'rate']
+    reloaded = load(path)
+    assert contents(reloaded) == {'Cat': ('Кошка', 2.0), 'Fox': ('Лиса', 4.0)}
+    reloaded.set_rate('Fox', 5.0)
+    reloaded.close()
+    assert contents(load(path))['Fox'] == ('Лиса', 5.0)
+
+
+def test_slot_taken_over_after_the_write_was_queued(make_deck):
+    path = make_deck({'Cat': 'Кот', 'Dog': 'Собака'})
+    db = load(path)
+    db.backend.append([{'op': 'del', 'key': 'Dog'}])
+    del db.data['Dog']
+    db.data['Fox'] = Record('Лиса')
+    assert db.data.slots['Fox'] == 1
+    db.backend.append([{'op': 'rate', 'key': 'Fox', 'rate': 4.0}])
+    assert db.backend.rates[1] == 1.0
+    assert journal(path) == ['del', 'rate']
+
+
+def test_compaction_maps_the_new_file(make_deck, monkeypatch):
+    monkeypatch.setattr(BinaryBackend, 'journal_limit', 0)
+    path = make_deck({'Cat': 'Кот', 'Dog': 'Собака'})
+    db = load(path, scheduler='sm2')
+    db.delete('Cat')
+    db.autosave.flush()
+    assert journal(path) == []
+    assert db.backend.slots == {'Dog': 0}
+    db.review('Dog', True)
+    db.autosave.flush()
+    assert journal(path) == []
+    reviewed = db.data['Dog'].schedule
+    db.close()
+    assert load(path, scheduler='sm2').data['Dog'].schedule == reviewed
@@ -0,0 +1,58 @@
+import pytest
+
+from main import DB, Config, Decks, Record
+
+
+@pytest.fixture
+def decks(make_deck):
+    """Three decks of 300 phrases under a budget that holds two of them."""
+    config = {'decks': {}, 'memory-budget': 1.5}
+    for name in 'abc':
+        path = make_deck({f'{name}{i}': f'слово{i}' for i in range(300)}, f'{name}.json')
+        config['decks'][name] = {'db-path': path}
+    Config.validate(config)
+    assert 300 * DB.phrase_cost * 2 < 1.5 * (1 << 20) < 300 * DB.phrase_cost * 3
+    Decks.configure(config)
+    return config
+
+
+def test_least_recently_used_deck_is_evicted(decks):
+    a = Decks.open('a')
+    a.set('Fresh', Record('Свежий'))
+    Decks.open('b')
+    Decks.use('c').wait()
+    Decks.evict()
+    assert list(Decks.resident) == ['b', 'c']
+    assert a.autosave.stopped
+
+    assert 'Fresh' in Decks.open('a').data  # flushed on eviction
+    assert list(Decks.resident) == ['b', 'c', 'a']
+
+
+def test_active_deck_is_never_evicted(decks, monkeypatch):
+    monkeypatch.setattr(Decks, 'budget', 0.1)
+    Decks.open('a')
+    Decks.open('b')
+    Decks.evict()
+    assert list(Decks.resident) == ['b']
+    assert Decks.active is Decks.resident['b']
+
+
+def test_switching_back_keeps_a_resident_deck(decks):
+    a = Decks.open('a')
+    Decks.open('b')
+    assert Decks.use('a') is a
+    assert a.loader is None
+
+
+def test_deck_names_must_be_unique():
+    with pytest.raises(ValueError, match='both'):
+        Config.validate({'db-path': 'dir/a.json', 'decks': {'a': {'db-path': 'other/a.json'}}})
+    assert list(Config.decks({'db-path': 'dir/a.json', 'decks': {'b': {'db-path': 'other/a.json'}}})) == ['a', 'b']
+
+
+def test_snapshots_are_named_after_the_deck(make_deck):
+    path = make_deck({'Cat': 'Кот'})
+    Decks.configure({'db-path': path, 'decks': {'copy': {'db-path': path, 'db-backend': 'binary'}}})
+    assert Decks.open('deck').snapshots.take() != Decks.open('copy').snapshots.take()
+    assert [len(Decks.get(name).snapshots.paths()) for name in ('deck', 'copy')] == [1, 1]
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def deck(make_deck):
+    path = make_deck({'Cat': ('Кот', 3.0), 'Dog': ('Собака', 2.0)})
+    with open('config.json', 'w', encoding='utf-8') as config_file:
+        json.dump({'db-path': path}, config_file)
+    with open('words.tsv', 'w', encoding='utf-8') as rows_file:
+        rows_file.write('phrase\ttranslation\trate\ncat\tкошка\t1\nfox\tлиса\t\n')
+    return path
+
+
+def imported(path: str, **options) -> dict[str, tuple[str, float]]:
+    main.import_rows('words.tsv', **options)
+    with open(path, encoding='utf-8') as db_file:
+        return {key: (value['translation'], value['rate']) for key, value in json.load(db_file).items()}
+
+
+@pytest.mark.parametrize(
+    'policy, cat',
+    [('keep-rate', ('Кошка', 3.0)), ('overwrite', ('Кошка', 1.0)), ('skip', ('Кот', 3.0))],
+)
+def test_policies_for_phrases_already_in_the_deck(deck, policy, cat):
+    assert imported(deck, policy=policy, header=True) == {'Cat': cat, 'Dog': ('Собака', 2.0), 'Fox': ('Лиса', 1.0)}
+
+
+def test_header_row_is_imported_unless_skipped(deck):
+    assert 'Phrase' in imported(deck)
+
+
+def test_mistyped_columns_are_mapped_from_the_english_layout(deck):
+    with open('words.tsv', 'w', encoding='utf-8') as rows_file:
+        rows_file.write('owl\tcjdf\n')
+    assert imported(deck, mistyped=(1,))['Owl'] == ('Сова', 1.0)
+
+
+def test_parallel_import_keeps_every_row(deck):
+    with open('words.tsv', 'w', encoding='utf-8') as rows_file:
+        rows_file.writelines(f'word{i}\tслово{i}\t{i % 7}\n' for i in range(25_000))
+    result = imported(deck, workers=2)
+    assert len(result) == 25_002
+    assert result['Word24999'] == ('Слово24999', 2.0)
+
+
+def test_missing_file_is_reported(deck, capsys):
+    main.import_rows('nope.tsv')
+    assert 'nope.tsv not found' in capsys.readouterr().out
+
+
+def test_bad_rates_fall_back_to_the_default(deck):
+    with open('words.tsv', 'w', encoding='utf-8') as rows_file:
+        rows_file.write('fox\tлиса\tnan\nowl\tсова\t-2\nyak\tяк\tinf\nemu\tэму\t0\n')
+    result = imported(deck)
+    assert [result[key][1] for key in ('Fox', 'Owl', 'Yak', 'Emu')] == [1.0, 1.0, 1.0, 0.0]
+
+
+def test_phrases_are_matched_regardless_of_case(make_deck):
+    path = make_deck({'New York': 'Нью-Йорк'})
+    with open('config.json', 'w', encoding='utf-8') as config_file:
+        json.dump({'db-path': path}, config_file)
+    with open('words.tsv', 'w', encoding='utf-8') as rows_file:
+        rows_file.write('new york\tнью йорк\t2\nNEW YORK\tНью-Йорк\t3\n')
+    assert imported(path, policy='overwrite') == {'New York': ('Нью-йорк', 3.0)}
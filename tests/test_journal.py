@@ -0,0 +1,92 @@
+import json
+import os
+
+from main import DB, JsonBackend, Record
+
+
+def load(path: str) -> DB:
+    db = DB('deck', {'db-path': path})
+    assert db.load()
+    return db
+
+
+def contents(db: DB) -> dict[str, tuple[str, float]]:
+    return {key: (record.translation, record.rate) for key, record in db.data.items()}
+
+
+def test_mutations_are_journaled_and_replayed(make_deck):
+    path = make_deck({'Cat': 'Кот', 'Dog': 'Собака'})
+    db = load(path)
+    db.set('Fox', Record('Лиса', 2.0))
+    db.delete('Dog')
+    db.set_rate('Cat', 0.5)
+    db.close()
+
+    with open(path, encoding='utf-8') as db_file:
+        assert set(json.load(db_file)) == {'Cat', 'Dog'}  # the deck file itself is left alone
+    assert os.path.exists(path + '.journal')
+    assert contents(load(path)) == {'Cat': ('Кот', 0.5), 'Fox': ('Лиса', 2.0)}
+
+
+def test_torn_journal_tail_is_ignored(make_deck):
+    path = make_deck({'Cat': 'Кот'})
+    with open(path + '.journal', 'w', encoding='utf-8') as journal:
+        journal.write(json.dumps({'op': 'rate', 'key': 'Cat', 'rate': 3.0}) + '\n')
+        journal.write('{"op": "set", "key": "Fo')
+
+    assert contents(load(path)) == {'Cat': ('Кот', 3.0)}
+
+
+def test_journal_is_folded_into_the_deck_once_it_grows(make_deck, monkeypatch):
+    monkeypatch.setattr(JsonBackend, 'journal_limit', 1)
+    path = make_deck({'Cat': 'Кот', 'Dog': 'Собака'})
+    db = load(path)
+    db.set('Fox', Record('Лиса'))
+    db.delete('Dog')
+    db.close()
+
+    assert not os.path.exists(path + '.journal')
+    assert not os.path.exists(path + '.journal.old')
+    with open(path, encoding='utf-8') as db_file:
+        assert set(json.load(db_file)) == {'Cat', 'Fox'}
+    assert contents(load(path)) == {'Cat': ('Кот', 1.0), 'Fox': ('Лиса', 1.0)}
+
+
+def test_interrupted_compaction_is_finished_on_load(make_deck):
+    path = make_deck({'Cat': 'Кот'})
+    with open(path + '.journal.old', 'w', encoding='utf-8') as journal:
+        journal.write(json.dumps({'op': 'set', 'key': 'Fox', 'translation': 'Лиса', 'rate': 1.0}) + '\n')
+    with open(path + '.journal', 'w', encoding='utf-8') as journal:
+        journal.write(json.dumps({'op': 'del', 'key': 'Cat'}) + '\n')
+
+    assert contents(load(path)) == {'Fox': ('Лиса', 1.0)}
+    assert not os.path.exists(path + '.journal.old')
+    with open(path, encoding='utf-8') as db_file:
+        assert set(json.load(db_file)) == {'Fox'}
+
+
+def test_failed_autosave_is_retried(make_deck, monkeypatch):
+    path = make_deck({'Cat': 'Кот'})
+    db = load(path)
+    append = db.backend.append
+    calls = []
+
+    def flaky(entries):
+        calls.append(len(entries))
+        if len(calls) == 1:
+            raise OSError('disk full')
+        append(entries)
+
+    monkeypatch.setattr(db.backend, 'append', flaky)
+    monkeypatch.setattr(db.autosave, 'debounce', 0.01)
+    db.set('Fox', Record('Лиса'))
+    db.autosave.thread.join(0.2)
+    assert db.autosave.error == 'OSError: disk full'
+    assert db.autosave.thread.is_alive()
+
+    db.set('Owl', Record('Сова'))
+    db.autosave.thread.join(0.2)
+    assert db.autosave.error is None
+    assert calls == [1, 2]
+    db.close()
+    assert contents(load(path)) == {'Cat': ('Кот', 1.0), 'Fox': ('Лиса', 1.0), 'Owl': ('Сова', 1.0)}
@@ -0,0 +1,33 @@
+from main import Key, KeyDecoder
+
+
+def scripts(keys: list[Key]) -> str:
+    return ''.join(key.script() for key in keys)
+
+
+def test_burst_of_keys_in_one_read():
+    assert scripts(KeyDecoder().feed(b'ab\r\x7f\t\x1b[A\x1b[3~')) == 'ab<enter><backspace><tab><up><delete>'
+
+
+def test_utf8_character_split_across_reads():
+    decoder = KeyDecoder()
+    data = 'жё'.encode()
+    assert decoder.feed(data[:1]) == []
+    assert scripts(decoder.feed(data[1:3])) == 'ж'
+    assert scripts(decoder.feed(data[3:])) == 'ё'
+
+
+def test_escape_sequence_split_across_reads():
+    decoder = KeyDecoder()
+    assert scripts(decoder.feed(b'x\x1b[')) == 'x'
+    assert decoder.feed(b'3') == []
+    assert scripts(decoder.feed(b'~y')) == '<delete>y'
+
+
+def test_lone_escape_is_the_escape_key():
+    assert scripts(KeyDecoder().feed(b'\x1b')) == '<esc>'
+    assert scripts(KeyDecoder().feed(b'\x1bx')) == '<esc>x'
+
+
+def test_unknown_sequences_are_dropped():
+    assert scripts(KeyDecoder().feed(b'\x1b[99za')) == 'a'
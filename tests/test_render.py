@@ -0,0 +1,56 @@
+import pytest
+
+from main import StrTool, Style, Term
+
+
+@pytest.mark.parametrize(
+    'line, width',
+    [
+        ('Cat', 3),
+        ('Кот', 3),
+        ('猫', 2),
+        ('é', 1),  # e + combining acute
+        ('👍🏻', 2),
+        ('👨‍👩‍👧', 2),
+        (f'{Style.BOLD}Cat{Style.RESET}', 3),
+    ],
+)
+def test_visible_len(line, width):
+    assert StrTool.visible_len(line) == width
+
+
+def test_visible_index_follows_the_measured_width():
+    line = '😀👍🏻x'
+    assert StrTool.visible_len(line) == 5
+    assert line[: StrTool.visible_index(line, 5)] == '😀👍🏻'
+    assert line[: StrTool.visible_index(line, 3)] == '😀'
+    assert StrTool.visible_index(f'{Style.BOLD}猫猫', 4) == len(Style.BOLD) + 1
+
+
+@pytest.fixture
+def frame(monkeypatch):
+    monkeypatch.setattr(Term, 'frame', ['Cat - Кот  ', 'Dog - Собака'])
+    monkeypatch.setattr(Term, 'buffer', list(Term.frame))
+
+
+def test_unchanged_frame_writes_nothing(frame):
+    assert Term._diff() == []
+
+
+def test_only_the_changed_span_is_written(frame):
+    Term.buffer[1] = 'Dog - Пёс   '
+    assert Term._diff() == [f'\033[2;7H{Style.RESET}Пёс   ']
+    Term.buffer[1] = 'Dog - Собачка'
+    assert Term._diff() == [f'\033[2;11H{Style.RESET}чка']
+
+
+def test_span_after_wide_characters_is_placed_by_columns(frame):
+    Term.frame[0] = '猫 - cat'
+    Term.buffer[0] = '猫 - cow'
+    assert Term._diff() == [f'\033[1;7H{Style.RESET}ow']
+
+
+def test_style_of_the_row_is_replayed_before_the_span(frame):
+    Term.frame[0] = f'{Style.BOLD}Cat{Style.RESET} - Кот'
+    Term.buffer[0] = f'{Style.BOLD}Cat{Style.RESET} - Кит'
+    assert Term._diff() == [f'\033[1;8H{Style.RESET}{Style.BOLD}{Style.RESET}и']
@@ -0,0 +1,54 @@
+import json
+import os
+
+import pytest
+
+import main
+from main import Key, Term
+
+
+@pytest.fixture
+def app(make_deck, monkeypatch):
+    """A one-deck config for replay, which switches the app to a headless terminal of its own size."""
+    for name in ('headless', 'width', 'height', 'in_width', 'in_height'):
+        monkeypatch.setattr(Term, name, getattr(Term, name))
+    path = make_deck({'Cat': 'Кот'})
+    with open('config.json', 'w', encoding='utf-8') as config_file:
+        json.dump({'db-path': path}, config_file)
+    return path
+
+
+def replay(script: str, *args) -> None:
+    with open('session.keys', 'w', encoding='utf-8') as script_file:
+        script_file.write(script)
+    main.replay('session.keys', *args)
+
+
+def test_script_round_trip():
+    keys = Key.parse_script('a<lt>b<enter>\n<esc><up>')
+    assert [str(key) for key in keys[:3]] == ['a', '<', 'b']
+    assert [key.special for key in keys[3:]] == [Key.Special.ENTER, Key.Special.ESCAPE, Key.Special.ARROW_UP]
+    assert ''.join(key.script() for key in keys) == 'a<lt>b<enter><esc><up>'
+
+
+def test_unknown_key_name_is_rejected():
+    with pytest.raises(ValueError, match='<entr>'):
+        Key.parse_script('a<entr>')
+
+
+def test_replay_leaves_the_deck_alone_unless_saving(app, capsys):
+    replay('aDog - собака<enter><esc>q')
+    assert '2 phrases in the deck' in capsys.readouterr().out
+    assert not os.path.exists(app + '.journal')
+
+    replay('aDog - собака<enter><esc>q', '80x25', 1, True)
+    assert '2 phrases in the deck' in capsys.readouterr().out
+    main.Decks.configure(main.Config.load())
+    assert set(main.Decks.open().data) == {'Cat', 'Dog'}
+
+
+def test_edit_without_a_translation_keeps_the_phrase(app, capsys):
+    replay('ecat<up>e' + '<backspace>' * 6 + '<enter><esc><esc>q', '80x25', 1, True)
+    assert '1 phrases in the deck' in capsys.readouterr().out
+    main.Decks.configure(main.Config.load())
+    assert main.Decks.open().data['Cat'].translation == 'Кот'
@@ -0,0 +1,65 @@
+import collections
+import math
+import random
+
+import pytest
+
+from main import Sampler
+
+
+@pytest.fixture(autouse=True)
+def seeded():
+    state = random.getstate()
+    random.seed(1)
+    yield
+    random.setstate(state)
+
+
+def draws(sampler: Sampler, n: int = 8000) -> collections.Counter:
+    return collections.Counter(sampler.sample() for _ in range(n))
+
+
+def test_draws_follow_the_weights():
+    counts = draws(Sampler(['a', 'b', 'c'], [1.0, 3.0, 0.0]))
+    assert counts['c'] == 0
+    assert counts['b'] / counts['a'] == pytest.approx(3, rel=0.1)
+
+
+def test_updates_and_removals_move_the_draws():
+    sampler = Sampler(['a', 'b'], [1.0, 1.0])
+    sampler.update('a', 0.0)
+    assert set(draws(sampler, 200)) == {'b'}
+    sampler.remove('b')
+    sampler.update('c', 2.0)
+    assert set(draws(sampler, 200)) == {'c'}
+    assert sampler.total() == pytest.approx(2.0)
+
+
+def test_tree_grows_past_its_capacity():
+    sampler = Sampler()
+    weights = {f'k{i}': 1.0 + i % 5 for i in range(100)}
+    for key, weight in weights.items():
+        sampler.update(key, weight)
+    assert sampler.total() == pytest.approx(math.fsum(weights.values()))
+    assert set(draws(sampler, 5000)) == set(weights)
+
+
+def test_removed_slots_are_reused():
+    sampler = Sampler([f'k{i}' for i in range(16)], [1.0] * 16)
+    sampler.remove('k3')
+    sampler.update('new', 1.0)
+    assert sampler.slots['new'] == 3
+    assert len(sampler.keys) == 16
+
+
+def test_all_zero_weights_still_draw():
+    sampler = Sampler(['a', 'b'], [0.0, 0.0])
+    assert set(draws(sampler, 200)) == {'a', 'b'}
+    assert Sampler().sample() is None
+
+
+def test_tree_holds_the_partial_sums():
+    weights = [float(i % 7) for i in range(1000)]
+    tree = Sampler([str(i) for i in range(1000)], weights).tree
+    for i in range(1, len(tree)):
+        assert tree[i] == math.fsum(weights[i - (i & -i) : i])
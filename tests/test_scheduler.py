@@ -0,0 +1,79 @@
+import pytest
+
+from main import DB, Autosave, Deck, Record, Schedule, Scheduler
+
+NOW = 1_700_000_000.0
+DAY = Scheduler.day
+
+
+def test_intervals_grow_one_six_then_by_ease():
+    schedule = Schedule(NOW, 0.0, 2.5)
+    intervals = []
+    for _ in range(4):
+        schedule = Scheduler.review(schedule, True, NOW)
+        intervals.append(schedule.interval)
+    assert intervals == [1.0, 6.0, 15.0, 37.5]
+    assert schedule.due == NOW + 37.5 * DAY
+
+
+def test_miss_brings_the_phrase_back_soon_with_lower_ease():
+    schedule = Scheduler.review(Schedule(NOW, 15.0, 1.4), False, NOW)
+    assert schedule.interval == Scheduler.relearn
+    assert schedule.due == pytest.approx(NOW + 600)
+    assert schedule.ease == 1.3  # never below
+    assert Scheduler.review(schedule, True, NOW).interval == 1.0
+
+
+def test_initial_schedule_follows_the_weighted_rate():
+    known = Scheduler.initial('Cat', 0.1, NOW)
+    hard = Scheduler.initial('Cat', 4.0, NOW)
+    assert (known.interval, known.ease) == (pytest.approx(10.0), 2.5)
+    assert hard.interval == 0.25 and hard.ease < 2.5
+    assert NOW + known.interval * DAY / 2 <= known.due <= NOW + known.interval * DAY
+    assert Scheduler.initial('Cat', 0.1, NOW) == known
+    assert Scheduler.initial('Cat', 0.0, NOW).interval == Scheduler.max_initial
+
+
+def test_next_is_the_most_overdue_and_skips_outdated_entries():
+    deck = Deck(['Cat', 'Dog', 'Fox'], ['Кот', 'Собака', 'Лиса'], [1.0] * 3)
+    deck['Cat'].schedule = Schedule(NOW - 10, 1.0, 2.5)
+    deck['Dog'].schedule = Schedule(NOW - 20, 1.0, 2.5)
+    deck['Fox'].schedule = Schedule(NOW + 10, 1.0, 2.5)
+    scheduler = Scheduler(deck)
+    assert scheduler.next(NOW) == 'Dog'
+
+    deck['Dog'].schedule = Schedule(NOW + DAY, 1.0, 2.5)
+    scheduler.push('Dog', deck['Dog'].schedule)
+    assert scheduler.next(NOW) == 'Cat'
+    del deck['Cat']
+    assert scheduler.next(NOW) is None
+
+
+def test_reviews_are_kept_across_a_reload(make_deck):
+    path = make_deck({'Cat': 'Кот', 'Dog': 'Собака'})
+    db = DB('deck', {'db-path': path, 'scheduler': 'sm2'})
+    assert db.load()
+    assert all(record.schedule is not None for record in db.data.values())
+    db.review('Cat', True)
+    db.set('Fox', Record('Лиса'))
+    reviewed = db.data['Cat'].schedule
+    db.close()
+
+    reloaded = DB('deck', {'db-path': path, 'scheduler': 'sm2'})
+    assert reloaded.load()
+    assert reloaded.data['Cat'].schedule == reviewed
+    assert reloaded.data['Cat'].rate == 0.75
+    assert reloaded.scheduler.next(reloaded.data['Fox'].schedule.due) == 'Fox'
+
+
+def test_first_load_leaves_the_deck_alone_without_autosave(make_deck, monkeypatch):
+    path = make_deck({'Cat': 'Кот'})
+    with open(path, 'rb') as db_file:
+        before = db_file.read()
+    monkeypatch.setattr(Autosave, 'enabled', False)
+    db = DB('deck', {'db-path': path, 'scheduler': 'sm2'})
+    assert db.load()
+    assert db.data['Cat'].schedule is not None
+    db.close()
+    with open(path, 'rb') as db_file:
+        assert db_file.read() == before
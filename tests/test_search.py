@@ -0,0 +1,109 @@
+import pytest
+
+from main import Deck, Decks, FuzzyIndex, Record, SearchCursor, SearchIndex
+
+PHRASES = {
+    'Cat': 'Кот',
+    'Big cat': 'Большой кот',
+    'Scatter': 'Разбросать',
+    'Dog': 'Собака',
+    'Hot dog': 'Хот-дог',
+}
+
+
+def deck() -> Deck:
+    return Deck(PHRASES, PHRASES.values(), [1.0] * len(PHRASES))
+
+
+def test_trigram_queries_match_substrings_of_phrases_and_translations():
+    index = SearchIndex(deck())
+    assert sorted(index.search('cat')) == ['Big cat', 'Cat', 'Scatter']
+    assert sorted(index.search('КОТ')) == ['Big cat', 'Cat']
+    assert index.search('кот', translations=False) == []
+    assert index.search('zzz') == []
+
+
+def test_short_queries_match_word_starts():
+    index = SearchIndex(deck())
+    assert sorted(index.search('ca')) == ['Big cat', 'Cat']
+    assert index.search('со') == ['Dog']
+    assert index.search('at') == []
+    assert sorted(index.search('do')) == ['Dog', 'Hot dog']
+    assert sorted(index.search('t d')) == ['Hot dog']
+
+
+def test_index_follows_the_deck():
+    data = deck()
+    index = SearchIndex(data)
+    data['Catfish'] = Record('Сом')  # picked up by the first query
+    assert sorted(index.search('catf')) == ['Catfish']
+
+    data['Cow'] = Record('Корова')
+    index.add('Cow', 'Корова')
+    del data['Cat']
+    index.remove('Cat')
+    assert index.search('коров') == ['Cow']
+    assert sorted(index.search('cat')) == ['Big cat', 'Catfish', 'Scatter']
+
+
+@pytest.fixture
+def active(make_deck):
+    Decks.configure({'db-path': make_deck(PHRASES)})
+    return Decks.open()
+
+
+def test_cursor_narrows_cached_results_without_the_index(active, monkeypatch):
+    cursor = SearchCursor()
+    assert sorted(cursor.search('cat')) == ['Big cat', 'Cat', 'Scatter']
+
+    def unexpected(*args):
+        raise AssertionError('narrowing went back to the index')
+
+    monkeypatch.setattr(active.index, 'candidates', unexpected)
+    assert cursor.search('catt') == ['Scatter']
+    assert sorted(cursor.search('cat')) == ['Big cat', 'Cat', 'Scatter']  # erasing pops back
+
+
+def test_cursor_yields_between_shards(active, monkeypatch):
+    monkeypatch.setattr(SearchCursor, 'shard_size', 1)
+    steps = SearchCursor().searching('cat')
+    shards = 0
+    try:
+        while True:
+            next(steps)
+            shards += 1
+    except StopIteration as done:
+        keys = done.value
+    assert sorted(keys) == ['Big cat', 'Cat', 'Scatter']
+    assert shards >= 3
+
+
+def test_cursor_drops_its_cache_when_the_deck_changes(active):
+    cursor = SearchCursor()
+    assert sorted(cursor.search('cat')) == ['Big cat', 'Cat', 'Scatter']
+    active.set('Catfish', Record('Сом'))
+    active.delete('Scatter')
+    assert sorted(cursor.search('cat')) == ['Big cat', 'Cat', 'Catfish']
+
+
+def test_fuzzy_matches_typos_and_the_wrong_layout():
+    index = FuzzyIndex(deck())
+    assert index.search('scater') == ['Scatter']
+    assert index.search('cj,frf') == ['Dog']  # "собака" typed on the English layout
+    assert sorted(index.search('вщпп')) == ['Dog', 'Hot dog']  # "dogg" typed on the Russian one
+    assert index.search('hot dig') == ['Hot dog']
+
+
+def test_fuzzy_lookup_yields_while_walking_the_trie():
+    index = FuzzyIndex(deck())
+    index.build()
+    steps = index.lookup('scater', 1, nodes=2)
+    walked = 0
+    try:
+        while True:
+            next(steps)
+            walked += 1
+    except StopIteration as done:
+        found = done.value
+    assert found == {'scatter': 1}
+    assert walked >= 5
@@ -0,0 +1,82 @@
+import json
+import os
+import time
+
+import main
+from main import DB, Decks, Record, Snapshots
+
+
+def load(path: str, **settings) -> DB:
+    db = DB('deck', {'db-path': path, **settings})
+    assert db.load()
+    return db
+
+
+def touch(snapshots: Snapshots, at: float) -> str:
+    os.makedirs(snapshots.directory, exist_ok=True)
+    path = os.path.join(snapshots.directory, f'{snapshots.prefix}-{time.strftime("%Y%m%d-%H%M%S", time.localtime(at))}.json.gz')
+    open(path, 'w').close()
+    return path
+
+
+def test_snapshot_after_enough_changes(make_deck):
+    db = load(make_deck({'Cat': 'Кот'}), **{'snapshot-changes': 3})
+    db.snapshots.last = time.time()
+    db.set('Dog', Record('Собака'))
+    db.set('Fox', Record('Лиса'))
+    db.autosave.flush()
+    assert db.snapshots.paths() == []
+    db.delete('Cat')
+    db.autosave.flush()
+    [path] = db.snapshots.paths()
+    assert set(Snapshots.read(path)) == {'Dog', 'Fox'}
+    assert db.snapshots.pending == 0
+    db.close()
+
+
+def test_snapshot_once_the_interval_is_over(make_deck):
+    db = load(make_deck({'Cat': 'Кот'}), **{'snapshot-changes': 0, 'snapshot-interval': 60})
+    db.snapshots.last = time.time()
+    db.set_rate('Cat', 2.0)
+    db.autosave.flush()
+    assert db.snapshots.paths() == []
+    db.snapshots.last -= 60
+    db.set_rate('Cat', 3.0)
+    db.autosave.flush()
+    [path] = db.snapshots.paths()
+    assert Snapshots.read(path)['Cat'].rate == 3.0
+    db.close()
+
+
+def test_pruning_keeps_the_last_and_one_per_hour_and_day(make_deck):
+    db = load(make_deck({'Cat': 'Кот'}), **{'snapshot-keep': {'last': 2, 'hourly': 2, 'daily': 3}})
+    now = time.mktime(time.strptime('20260110-120000', '%Y%m%d-%H%M%S'))
+    minute, hour, day = 60, 3600, 86400
+    paths = {offset: touch(db.snapshots, now - offset) for offset in (0, minute, 2 * minute, hour, hour + minute, 2 * hour, day, day + hour, 5 * day)}
+    db.snapshots.prune()
+    # The newest two are also the newest of their hours, and the first of them the newest of today
+    assert sorted(db.snapshots.paths()) == sorted(paths[offset] for offset in (0, minute, day, 5 * day))
+
+
+def test_restore_brings_back_a_snapshot_and_keeps_the_current_deck(make_deck, capsys):
+    path = make_deck({'Cat': 'Кот'})
+    with open('config.json', 'w', encoding='utf-8') as config_file:
+        json.dump({'db-path': path}, config_file)
+    db = load(path)
+    old = db.snapshots.take()
+    db.set('Dog', Record('Собака'))
+    db.close()
+    os.rename(old, touch(db.snapshots, time.time() - 3600))
+
+    main.restore('latest')
+    assert 'phrases from deck-' in capsys.readouterr().out
+    assert set(Decks.open().data) == {'Cat'}
+    newest = Decks.active.snapshots.paths()[0]
+    assert set(Snapshots.read(newest)) == {'Cat', 'Dog'}
+
+
+def test_restore_of_a_missing_snapshot_is_reported(make_deck, capsys):
+    with open('config.json', 'w', encoding='utf-8') as config_file:
+        json.dump({'db-path': make_deck({'Cat': 'Кот'})}, config_file)
+    main.restore('nope.json.gz')
+    assert 'No snapshot nope.json.gz' in capsys.readouterr().out
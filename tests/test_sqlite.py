@@ -0,0 +1,73 @@
+import sqlite3
+
+from main import DB, Record, SqliteBackend, SqliteIndex
+
+
+def load(path: str, **settings) -> DB:
+    db = DB('deck', {'db-path': path, 'db-backend': 'sqlite', **settings})
+    assert db.load()
+    return db
+
+
+def contents(db: DB) -> dict[str, tuple[str, float]]:
+    return {key: (record.translation, record.rate) for key, record in db.data.items()}
+
+
+def legacy_file(path: str, rows: list[tuple[str, str, float]]) -> None:
+    """A deck file from before the schedule columns and the FTS table."""
+    connection = sqlite3.connect(SqliteBackend(path).path)
+    with connection:
+        connection.execute('CREATE TABLE records (phrase TEXT PRIMARY KEY, translation TEXT NOT NULL, rate REAL NOT NULL)')
+        connection.executemany('INSERT INTO records VALUES (?, ?, ?)', rows)
+    connection.close()
+
+
+def test_json_deck_is_migrated_on_first_use(make_deck):
+    path = make_deck({'Cat': ('Кот', 2.0), 'Dog': 'Собака'})
+    db = load(path)
+    assert contents(db) == {'Cat': ('Кот', 2.0), 'Dog': ('Собака', 1.0)}
+    db.close()
+    with open(path, 'w', encoding='utf-8') as db_file:
+        db_file.write('{}')  # the SQLite file is read from now on
+    assert contents(load(path)) == {'Cat': ('Кот', 2.0), 'Dog': ('Собака', 1.0)}
+
+
+def test_mutations_are_upserted(make_deck):
+    path = make_deck({'Cat': 'Кот', 'Dog': 'Собака'})
+    db = load(path)
+    db.set('Cat', Record('Кошка', 3.0))
+    db.set('Fox', Record('Лиса'))
+    db.delete('Dog')
+    db.set_rate('Fox', 0.5)
+    db.close()
+    assert contents(load(path)) == {'Cat': ('Кошка', 3.0), 'Fox': ('Лиса', 0.5)}
+
+
+def test_reviews_are_kept(make_deck):
+    path = make_deck({'Cat': 'Кот'})
+    db = load(path, scheduler='sm2')
+    db.review('Cat', True)
+    reviewed = db.data['Cat'].schedule
+    db.close()
+    assert load(path, scheduler='sm2').data['Cat'].schedule == reviewed
+
+
+def test_old_file_gets_the_schedule_columns_and_a_full_text_index(workdir):
+    path = str(workdir / 'deck.json')
+    legacy_file(path, [('Cat', 'Кот', 2.0), ('Scatter', 'Разбросать', 1.0)])
+    db = load(path)
+    assert contents(db) == {'Cat': ('Кот', 2.0), 'Scatter': ('Разбросать', 1.0)}
+    assert all(record.schedule is None for record in db.data.values())
+    assert sorted(db.backend.search('cat')) == ['Cat', 'Scatter']
+    assert db.backend.search('брос') == ['Scatter']
+
+
+def test_full_text_search_follows_the_writes(make_deck):
+    db = load(make_deck({'Cat': 'Кот', 'Dog': 'Собака'}))
+    assert isinstance(db.index, SqliteIndex)
+    db.set('Catfish', Record('Сом'))
+    db.delete('Cat')
+    db.autosave.flush()
+    assert db.backend.search('cat') == ['Catfish']
+    assert db.backend.search('сом', translations=False) == []
+    assert sorted(db.index.search('cat')) == ['Catfish']